@@ -1,6 +1,6 @@
 import logging
 
-from flask import Flask, jsonify, request, abort, session
+from flask import Flask, jsonify, request, abort, session, g
 from werkzeug.local import LocalProxy
 
 from .config import get_config
@@ -34,6 +34,10 @@ def create_app(config_overrides: dict | None = None):
     if config_overrides:
         app.config.update(config_overrides)
 
+    # en tests el rate limit va apagado salvo que se pida explícitamente
+    if app.config.get("TESTING") and "RATELIMIT_ENABLED" not in (config_overrides or {}):
+        app.config["RATELIMIT_ENABLED"] = False
+
     _install_request_proxy_fix()
 
     logging.basicConfig(level=logging.INFO)
@@ -45,8 +49,26 @@ def create_app(config_overrides: dict | None = None):
     db.init_app(app)
 
     from . import models  # noqa: F401
+    from .services import book_search  # noqa: F401  (DDL del índice FTS)
+    from .services import generations  # noqa: F401  (contadores de cambios)
     migrate.init_app(app, db)
 
+    from .security.principal import init_principal, current_principal
+    init_principal(app)
+
+    from .security.event_writer import init_security_event_writer
+    init_security_event_writer(app)
+
+    from .security.rate_limit import init_rate_limiter
+    init_rate_limiter(app)
+
+    from .services.book_indexes import init_book_indexes
+    init_book_indexes(app)
+
+    # antes que RBAC/rate limit: también se mide lo que se rechaza
+    from .metrics import init_metrics, count as count_metric
+    init_metrics(app)
+
     # -----------------------------
     # Blueprints
     # -----------------------------
@@ -64,6 +86,12 @@ def create_app(config_overrides: dict | None = None):
     app.register_blueprint(book_requests_bp)
     app.register_blueprint(admin_bp)
 
+    # -----------------------------
+    # CLI (flask books ...)
+    # -----------------------------
+    from .cli import books_cli
+    app.cli.add_command(books_cli)
+
     # -----------------------------
     # RBAC rules
     # -----------------------------
@@ -79,6 +107,32 @@ def create_app(config_overrides: dict | None = None):
         Rule(blueprint="book_requests", methods={"*"}, roles={"reader", "admin"}),
     ]
 
+    # -----------------------------
+    # Rate limit: presupuesto (por rol o IP) y coste por endpoint
+    # -----------------------------
+    from .security.rate_limit import (
+        Budget, LimitRule, books_query_cost,
+        find_limit_rule, check_rate_limit, rate_limit_headers,
+    )
+
+    RATE_LIMITS = [
+        LimitRule(endpoint="auth.login", budget=Budget(10, 60)),
+        LimitRule(endpoint="auth.register", budget=Budget(6, 60)),
+        LimitRule(blueprint="auth", budget=Budget(20, 60)),
+
+        LimitRule(
+            blueprint="books",
+            budget=Budget(120, 60),
+            role_budgets={"reader": Budget(300, 60), "admin": Budget(1200, 60)},
+            costs={
+                "books.search_books": books_query_cost,
+                "books.list_books": books_query_cost,
+                "books.suggest_books": 0.2,  # una por tecla, resuelta en memoria
+                "books.import_books": 20,
+            },
+        ),
+    ]
+
     # -----------------------------
     # Error handlers (JSON)
     # -----------------------------
@@ -113,36 +167,14 @@ def create_app(config_overrides: dict | None = None):
         if request.method == "OPTIONS":
             return None
 
-        # Públicos simples
-        if endpoint in {"static", "health", "routes"}:
+        # Públicos simples (/metrics autoriza por su cuenta: token o admin)
+        if endpoint in {"static", "health", "routes", "metrics"}:
             return None
 
-        # Rate limit SOLO auth.*
-        if (not app.config.get("TESTING")) and endpoint.startswith("auth."):
-            from .security.rate_limit import hit
-
-            xff = request.headers.get("X-Forwarded-For")
-            ip = (xff.split(",")[0].strip() if xff else request.remote_addr) or "unknown"
-
-            if endpoint == "auth.login":
-                limit, window = 10, 60
-            elif endpoint == "auth.register":
-                limit, window = 6, 60
-            else:
-                limit, window = 20, 60
-
-            key = f"{ip}:{endpoint}"
-            if not hit(key, limit=limit, window_sec=window):
-                record_security_event(
-                    event_type="rate_limited",
-                    status_code=429,
-                    req=request,
-                    user=None,
-                    details=f"limit={limit} window={window}",
-                )
-                abort(429)
-
-            return None  # auth es público
+        # auth es público, pero con rate limit por IP
+        if endpoint.startswith("auth."):
+            _enforce_rate_limit(None)
+            return None
 
         # UI pública
         if bp == "ui" or endpoint.startswith("ui."):
@@ -164,8 +196,8 @@ def create_app(config_overrides: dict | None = None):
             )
             abort(401)
 
-        from .models import User
-        user = db.session.get(User, user_id)
+        # una sola resolución por request (queda en g.principal)
+        user = current_principal()
 
         # Usuario bloqueado
         if user and getattr(user, "is_blocked", False):
@@ -189,8 +221,41 @@ def create_app(config_overrides: dict | None = None):
             )
             abort(403)
 
+        _enforce_rate_limit(user)
         return None
 
+    def _enforce_rate_limit(principal):
+        if not app.config.get("RATELIMIT_ENABLED"):
+            return
+
+        rule = find_limit_rule(request.endpoint, request.blueprint, RATE_LIMITS)
+        if rule is None:
+            return
+
+        result = check_rate_limit(rule, request, principal)
+        g.rate_limit = result
+        count_metric("rate_limit_decisions_total", rule=rule.name, result="allowed" if result.allowed else "limited")
+
+        if not result.allowed:
+            record_security_event(
+                event_type="rate_limited",
+                status_code=429,
+                req=request,
+                user=principal,
+                details=(
+                    f"rule={rule.name} limit={result.limit} "
+                    f"window={int(result.window_sec)} cost={rule.cost_for(request):g}"
+                ),
+            )
+            abort(429)
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        result = g.pop("rate_limit", None)
+        if result is not None:
+            response.headers.update(rate_limit_headers(result))
+        return response
+
     # -----------------------------
     # Health / debug
     # -----------------------------
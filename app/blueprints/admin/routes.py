@@ -6,10 +6,10 @@ from flask import request, jsonify, session, abort
 
 from app.extensions import db
 
-from app.models.book import Book
-from app.models.book_request import BookRequest
+from app.models.book_request import REQUEST_STATUSES
 
 from app.services.admin_audit import log_admin_action
+from app.services.request_transitions import other_statuses, transition_request
 
 from ..auth.decorators import login_required
 from . import bp
@@ -21,7 +21,6 @@ from app.security.permissions import (
 )
 
 ALLOWED_ROLES = {"reader", "moderator", "admin"}
-ALLOWED_REQUEST_STATUSES = {"pending", "accepted", "rejected", "cancelled"}
 
 
 def _json() -> dict:
@@ -74,25 +73,6 @@ def _parse_bool(v) -> bool:
     raise ValueError("invalid boolean")
 
 
-def _set_book_availability_from_requests(book_id: int) -> None:
-    """
-    Si hay alguna solicitud accepted para el libro -> is_available=False
-    Si no -> is_available=True
-    """
-    has_accepted = (
-        db.session.query(BookRequest.id)
-        .filter(BookRequest.book_id == book_id, BookRequest.status == "accepted")
-        .first()
-        is not None
-    )
-
-    book = db.session.get(Book, book_id)
-    if not book:
-        return
-
-    book.is_available = not has_accepted
-
-
 def _required_permission_for_request_status(new_status: str) -> str:
     s = (new_status or "").strip().lower()
     if s == "rejected":
@@ -109,38 +89,36 @@ def admin_set_request_status(request_id: int):
     data = _json()
     new_status = (data.get("status") or "").strip().lower()
 
-    if new_status not in ALLOWED_REQUEST_STATUSES:
+    if new_status not in REQUEST_STATUSES:
         abort(400, description="Invalid status")
 
-    req = db.session.get(BookRequest, request_id)
-    if req is None:
-        abort(404)
-
     # ✅ v1.5: permiso por acción (no por rol)
     required_perm = _required_permission_for_request_status(new_status)
     if not role_has_permission(_role(), required_perm):
         abort(403, description="forbidden")
 
-    old_status = req.status
-    req.status = new_status
-
-    # sincroniza disponibilidad del libro si toca
-    if new_status == "accepted":
-        book = db.session.get(Book, req.book_id)
-        if book is None:
-            abort(404)
-        book.is_available = False
+    # compare-and-set desde cualquier otro estado, sin leerlo antes; el
+    # libro se reclama/libera en la misma transacción
+    result = transition_request(request_id, new_status, from_status=other_statuses(new_status))
+    if result.error == "not_found":
+        abort(404)
+    if result.ok:
+        old_status = result.old_status
+    elif result.error == "invalid_state" and result.status == new_status:
+        old_status = new_status  # ya estaba así
     else:
-        _set_book_availability_from_requests(req.book_id)
-
-    db.session.commit()
+        db.session.rollback()
+        if result.error == "book_not_available":
+            return jsonify(error="book_not_available"), 409
+        return jsonify(error="request_changed_concurrently"), 409
 
+    # la auditoría hace commit junto con la transición (una sola transacción)
     log_admin_action(
         admin_id=_uid(),
         action=f"request.status.{new_status}",
         target_type="request",
-        target_id=req.id,
-        details={"old_status": old_status, "new_status": req.status},
+        target_id=request_id,
+        details={"old_status": old_status, "new_status": new_status},
     )
 
-    return jsonify({"message": "Request updated", "id": req.id, "status": req.status}), 200
+    return jsonify({"message": "Request updated", "id": request_id, "status": new_status}), 200
@@ -5,8 +5,7 @@ from functools import wraps
 
 from app.extensions import db
 from app.models.user import User
-from app.models.book import Book
-from app.models.book_request import BookRequest
+from app.models.book_request import BookRequest, REQUEST_STATUSES
 
 from app.security.permissions import (
     role_has_permission,
@@ -15,15 +14,22 @@ from app.security.permissions import (
     P_REQUESTS_READ,
     P_REQUESTS_ACCEPT,
     P_REQUESTS_REJECT,
+    P_STATS_READ,
+)
+from app.services.admin_stats import admin_stats
+from app.pagination import encode_cursor, decode_cursor, parse_limit
+from app.services.admin_audit import log_admin_actions
+from app.services.request_transitions import (
+    BulkTransitionItem,
+    bulk_transition_requests,
+    other_statuses,
+    transition_request,
 )
 
 from app.blueprints.auth.decorators import login_required
 from . import bp
 
 
-ALLOWED_REQUEST_STATUSES = {"pending", "accepted", "rejected", "cancelled"}
-
-
 def _role() -> str:
     role = session.get("role")
     if not role:
@@ -41,6 +47,19 @@ def admin_required(fn):
     return wrapper
 
 
+# -----------------------
+# STATS (dashboard)
+# -----------------------
+@bp.get("/stats")
+@login_required
+@admin_required
+def api_admin_stats():
+    if not role_has_permission(_role(), P_STATS_READ):
+        abort(403, description="forbidden")
+
+    return jsonify(admin_stats()), 200
+
+
 # -----------------------
 # USERS (lo tuyo)
 # -----------------------
@@ -127,9 +146,18 @@ def api_admin_set_user_block(user_id: int):
 @login_required
 @admin_required
 def api_admin_list_book_requests():
+    """
+    Keyset pagination sobre id (más recientes primero). Cada filtro tiene
+    su índice compuesto, así que cualquier página cuesta lo mismo.
+    """
     if not role_has_permission(_role(), P_REQUESTS_READ):
         abort(403, description="forbidden")
 
+    try:
+        limit = parse_limit(request.args.get("limit"), default=100, maximum=500)
+    except ValueError:
+        abort(400, description="limit must be int")
+
     status = (request.args.get("status") or "").strip().lower()
     book_id = (request.args.get("book_id") or "").strip()
     requester_id = (request.args.get("requester_id") or "").strip()
@@ -137,7 +165,7 @@ def api_admin_list_book_requests():
     q = BookRequest.query
 
     if status:
-        if status not in ALLOWED_REQUEST_STATUSES:
+        if status not in REQUEST_STATUSES:
             abort(400, description="Invalid status")
         q = q.filter(BookRequest.status == status)
 
@@ -155,20 +183,37 @@ def api_admin_list_book_requests():
             abort(400, description="requester_id must be int")
         q = q.filter(BookRequest.requester_id == rid)
 
-    items = q.order_by(BookRequest.id.desc()).limit(300).all()
+    cursor = (request.args.get("cursor") or "").strip()
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, (int,))
+        except ValueError:
+            abort(400, description="Invalid cursor")
+        q = q.filter(BookRequest.id < after_id)
+
+    items = q.order_by(BookRequest.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].id)
 
     return jsonify(
-        [
-            {
-                "id": r.id,
-                "book_id": r.book_id,
-                "requester_id": r.requester_id,
-                "status": r.status,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-            }
-            for r in items
-        ]
+        {
+            "items": [
+                {
+                    "id": r.id,
+                    "book_id": r.book_id,
+                    "requester_id": r.requester_id,
+                    "status": r.status,
+                    "created_at": r.created_at.isoformat() if r.created_at else None,
+                    "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+                }
+                for r in items
+            ],
+            "limit": limit,
+            "next_cursor": next_cursor,
+        }
     )
 
 
@@ -180,19 +225,6 @@ def _required_perm_for_request_status(new_status: str) -> str:
         return P_REQUESTS_REJECT
     abort(400, description="Only accepted/rejected allowed here")
 
-def _set_book_availability_from_requests(book_id: int) -> None:
-    has_accepted = (
-        db.session.query(BookRequest.id)
-        .filter(BookRequest.book_id == book_id, BookRequest.status == "accepted")
-        .first()
-        is not None
-    )
-    book = db.session.get(Book, book_id)
-    if not book:
-        return
-    book.is_available = not has_accepted
-
-
 @bp.patch("/book-requests/<int:request_id>/status")
 @login_required
 @admin_required
@@ -207,28 +239,100 @@ def api_admin_set_book_request_status(request_id: int):
     if not role_has_permission(_role(), required_perm):
         abort(403, description="forbidden")
 
-    req = db.session.get(BookRequest, request_id)
-    if req is None:
+    # compare-and-set desde cualquier otro estado (sin leerlo antes) +
+    # reclamar/liberar el libro en la misma transacción
+    result = transition_request(request_id, new_status, from_status=other_statuses(new_status))
+    if result.error == "not_found":
         abort(404)
+    if result.ok:
+        old_status = result.old_status
+        db.session.commit()
+    elif result.error == "invalid_state" and result.status == new_status:
+        old_status = new_status  # ya estaba así
+    else:
+        db.session.rollback()
+        if result.error == "book_not_available":
+            return jsonify({"error": "book_not_available"}), 409
+        return jsonify({"error": "request_changed_concurrently"}), 409
+
+    return jsonify(
+        {
+            "message": "ok",
+            "id": request_id,
+            "old_status": old_status,
+            "status": new_status,
+        }
+    ), 200
 
-    old_status = req.status
-    req.status = new_status
 
-    # sincroniza disponibilidad del libro
-    if new_status == "accepted":
-        book = db.session.get(Book, req.book_id)
-        if book:
-            book.is_available = False
-    else:
-        _set_book_availability_from_requests(req.book_id)
+BULK_MAX_ITEMS = 500
+
 
+@bp.patch("/book-requests/bulk")
+@login_required
+@admin_required
+def api_admin_bulk_set_book_request_status():
+    """
+    Moderación en lote: {"items": [{"id": 1, "status": "accepted"}, ...]}.
+    Permisos una vez por estado pedido, todas las transiciones y la
+    auditoría en una sola transacción, y resultado por elemento.
+    """
+    data = request.get_json(silent=True) or {}
+    raw_items = data.get("items")
+
+    if not isinstance(raw_items, list) or not raw_items:
+        abort(400, description="items must be a non-empty list")
+    if len(raw_items) > BULK_MAX_ITEMS:
+        abort(400, description=f"at most {BULK_MAX_ITEMS} items")
+
+    items = []
+    for raw in raw_items:
+        if not isinstance(raw, dict):
+            abort(400, description="each item must be {id, status}")
+        try:
+            rid = int(raw.get("id"))
+        except (TypeError, ValueError):
+            abort(400, description="id must be int")
+        status = str(raw.get("status") or "").strip().lower()
+        if status not in {"accepted", "rejected"}:
+            abort(400, description="status must be accepted|rejected")
+        items.append(BulkTransitionItem(rid, status))
+
+    for status in {item.status for item in items}:
+        if not role_has_permission(_role(), _required_perm_for_request_status(status)):
+            abort(403, description="forbidden")
+
+    results = bulk_transition_requests(items)
+
+    changed = [r for r in results if r.ok and r.old_status != r.status]
+    log_admin_actions(
+        admin_id=session["user_id"],
+        actions=[
+            {
+                "action": f"request.status.{r.status}",
+                "target_type": "request",
+                "target_id": r.request_id,
+                "details": {"old_status": r.old_status, "new_status": r.status, "bulk": True},
+            }
+            for r in changed
+        ],
+        commit=False,
+    )
     db.session.commit()
 
     return jsonify(
         {
-            "message": "ok",
-            "id": req.id,
-            "old_status": old_status,
-            "status": req.status,
+            "results": [
+                {
+                    "id": r.request_id,
+                    "ok": r.ok,
+                    "status": r.status,
+                    "old_status": r.old_status,
+                    "error": r.error,
+                }
+                for r in results
+            ],
+            "applied": len(changed),
+            "failed": sum(1 for r in results if not r.ok),
         }
     ), 200
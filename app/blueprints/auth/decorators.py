@@ -1,7 +1,6 @@
 from functools import wraps
 from flask import session, jsonify
-from app.extensions import db
-from app.models.user import User
+from app.security.principal import current_principal
 
 def login_required(fn):
     @wraps(fn)
@@ -10,7 +9,7 @@ def login_required(fn):
         if not user_id:
             return jsonify(error="auth_required"), 401
 
-        user = db.session.get(User, user_id)
+        user = current_principal()
         if not user:
             return jsonify(error="auth_required"), 401
 
@@ -1,7 +1,14 @@
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify, session, abort
+from sqlalchemy import func, tuple_
+
 from ...extensions import db
 from ...models import Book, BookRequest
+from ...models.book_request import PENDING, ACCEPTED, REJECTED, CANCELLED, REQUEST_STATUSES
+from ...pagination import encode_cursor, decode_cursor, parse_limit
 from ..auth.decorators import login_required
+from ...services.request_transitions import transition_request
 
 bp = Blueprint("book_requests", __name__, url_prefix="/requests")
 
@@ -34,7 +41,7 @@ def create_request():
         BookRequest.query.filter_by(
             book_id=book.id,
             requester_id=requester_id,
-            status="PENDING",
+            status=PENDING,
         )
         .first()
     )
@@ -45,10 +52,11 @@ def create_request():
     req = BookRequest(
         book_id=book.id,
         requester_id=requester_id,
-        status="PENDING",
+        status=PENDING,
     )
 
     db.session.add(req)
+    book.pending_count = Book.pending_count + 1  # UPDATE atómico, sin leer el valor
     db.session.commit()
 
     return jsonify(
@@ -64,15 +72,56 @@ def create_request():
 @bp.get("/mine")
 @login_required
 def my_requests():
+    """
+    Una sola consulta (solicitud + columnas del libro), keyset sobre
+    (created_at, id) con ix_book_requests_requester_id_created_at.
+    """
     user_id = session["user_id"]
 
-    reqs = (
-        BookRequest.query
-        .filter_by(requester_id=user_id)
-        .order_by(BookRequest.created_at.desc())
+    try:
+        limit = parse_limit(request.args.get("limit"), default=50, maximum=200)
+    except ValueError:
+        return jsonify(error="bad_request", message="limit must be an integer"), 400
+
+    query = (
+        db.session.query(
+            BookRequest.id,
+            BookRequest.status,
+            BookRequest.created_at,
+            Book.id.label("book_id"),
+            Book.title,
+            Book.author,
+            Book.donor_id,
+        )
+        .join(Book, Book.id == BookRequest.book_id)
+        .filter(BookRequest.requester_id == user_id)
+    )
+
+    status = (request.args.get("status") or "").strip().lower()
+    if status:
+        if status not in REQUEST_STATUSES:
+            return jsonify(error="bad_request", message="invalid status"), 400
+        query = query.filter(BookRequest.status == status)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after_created, after_id = decode_cursor(cursor, (datetime, int))
+        except ValueError:
+            return jsonify(error="bad_request", message="invalid cursor"), 400
+        query = query.filter(tuple_(BookRequest.created_at, BookRequest.id) < (after_created, after_id))
+
+    rows = (
+        query.order_by(BookRequest.created_at.desc(), BookRequest.id.desc())
+        .limit(limit + 1)
         .all()
     )
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
     return jsonify(
         items=[
             {
@@ -80,100 +129,138 @@ def my_requests():
                 "status": r.status,
                 "created_at": r.created_at.isoformat(),
                 "book": {
-                    "id": r.book.id,
-                    "title": r.book.title,
-                    "author": r.book.author,
-                    "donor_id": r.book.donor_id,
+                    "id": r.book_id,
+                    "title": r.title,
+                    "author": r.author,
+                    "donor_id": r.donor_id,
                 },
             }
-            for r in reqs
-        ]
+            for r in rows
+        ],
+        limit=limit,
+        next_cursor=next_cursor,
     ), 200
 
 
-# ---------- CANCEL REQUEST (REQUESTER) ----------
-@bp.patch("/<int:request_id>/cancel")
+# ---------- INCOMING (DONOR) ----------
+@bp.get("/incoming")
 @login_required
-def cancel_request(request_id):
+def incoming_requests():
+    """
+    Solicitudes sobre mis libros: un join books(donor_id) ->
+    book_requests(book_id, status, created_at), keyset sobre (created_at, id),
+    y un GROUP BY con los conteos por estado.
+    """
     user_id = session["user_id"]
 
-    # SQLAlchemy 2.x: Session.get + abort 404
-    req = db.session.get(BookRequest, request_id)
-    if req is None:
-        abort(404)
+    try:
+        limit = parse_limit(request.args.get("limit"), default=50, maximum=200)
+    except ValueError:
+        return jsonify(error="bad_request", message="limit must be an integer"), 400
 
-    if req.requester_id != user_id:
-        return jsonify(error="forbidden"), 403
-
-    if req.status != "PENDING":
-        return jsonify(error="invalid_state", current=req.status, allowed=["PENDING"]), 400
-
-    req.status = "CANCELLED"
+    base = (
+        db.session.query(BookRequest)
+        .join(Book, Book.id == BookRequest.book_id)
+        .filter(Book.donor_id == user_id)
+    )
 
-    # si no hay ACCEPTED para este libro, vuelve disponible
-    has_accepted = (
-        BookRequest.query
-        .filter_by(book_id=req.book_id, status="ACCEPTED")
-        .first()
-        is not None
+    counts = dict.fromkeys(sorted(REQUEST_STATUSES), 0)
+    for status_value, n in (
+        base.with_entities(BookRequest.status, func.count(BookRequest.id))
+        .group_by(BookRequest.status)
+    ):
+        counts[status_value] = n
+
+    query = base.with_entities(
+        BookRequest.id,
+        BookRequest.status,
+        BookRequest.requester_id,
+        BookRequest.created_at,
+        Book.id.label("book_id"),
+        Book.title,
+        Book.author,
     )
-    if not has_accepted:
-        req.book.is_available = True
 
-    db.session.commit()
-    return jsonify(message="cancelled", id=req.id, status=req.status), 200
+    status = (request.args.get("status") or "").strip().lower()
+    if status:
+        if status not in REQUEST_STATUSES:
+            return jsonify(error="bad_request", message="invalid status"), 400
+        query = query.filter(BookRequest.status == status)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after_created, after_id = decode_cursor(cursor, (datetime, int))
+        except ValueError:
+            return jsonify(error="bad_request", message="invalid cursor"), 400
+        query = query.filter(tuple_(BookRequest.created_at, BookRequest.id) < (after_created, after_id))
+
+    rows = (
+        query.order_by(BookRequest.created_at.desc(), BookRequest.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
 
-# ---------- ACCEPT / REJECT (DONOR) ----------
-def _ensure_donor(req: BookRequest):
-    user_id = session["user_id"]
-    return req.book.donor_id == user_id
+    return jsonify(
+        items=[
+            {
+                "id": r.id,
+                "status": r.status,
+                "requester_id": r.requester_id,
+                "created_at": r.created_at.isoformat(),
+                "book": {"id": r.book_id, "title": r.title, "author": r.author},
+            }
+            for r in rows
+        ],
+        counts=counts,
+        limit=limit,
+        next_cursor=next_cursor,
+    ), 200
 
 
-@bp.patch("/<int:request_id>/accept")
-@login_required
-def donor_accept(request_id):
-    req = db.session.get(BookRequest, request_id)
-    if req is None:
+# ---------- TRANSICIONES ----------
+# Un UPDATE condicional por transición (services.request_transitions):
+# sin leer-comprobar-escribir, dos accepts concurrentes no ganan ambos.
+def _transition_response(result, message: str):
+    if not result.ok:
+        # la transición deja la transacción a medias: se deshace aquí
+        db.session.rollback()
+    if result.error == "not_found":
         abort(404)
-
-    if not _ensure_donor(req):
+    if result.error == "forbidden":
         return jsonify(error="forbidden"), 403
-
-    if req.status != "PENDING":
-        return jsonify(error="invalid_state", current=req.status, allowed=["PENDING"]), 400
-
-    req.status = "ACCEPTED"
-    req.book.is_available = False
+    if result.error == "invalid_state":
+        return jsonify(error="invalid_state", current=result.status, allowed=[PENDING]), 400
+    if result.error == "book_not_available":
+        return jsonify(error="book_not_available"), 409
 
     db.session.commit()
-    return jsonify(message="accepted", id=req.id, status=req.status), 200
+    return jsonify(message=message, id=result.request_id, status=result.status), 200
 
 
-@bp.patch("/<int:request_id>/reject")
+# ---------- CANCEL REQUEST (REQUESTER) ----------
+@bp.patch("/<int:request_id>/cancel")
 @login_required
-def donor_reject(request_id):
-    req = db.session.get(BookRequest, request_id)
-    if req is None:
-        abort(404)
+def cancel_request(request_id):
+    result = transition_request(request_id, CANCELLED, requester_id=session["user_id"])
+    return _transition_response(result, "cancelled")
 
-    if not _ensure_donor(req):
-        return jsonify(error="forbidden"), 403
 
-    if req.status != "PENDING":
-        return jsonify(error="invalid_state", current=req.status, allowed=["PENDING"]), 400
+# ---------- ACCEPT / REJECT (DONOR) ----------
+@bp.patch("/<int:request_id>/accept")
+@login_required
+def donor_accept(request_id):
+    result = transition_request(request_id, ACCEPTED, donor_id=session["user_id"])
+    return _transition_response(result, "accepted")
 
-    req.status = "REJECTED"
 
-    # si no hay ACCEPTED para este libro, vuelve disponible
-    has_accepted = (
-        BookRequest.query
-        .filter_by(book_id=req.book_id, status="ACCEPTED")
-        .first()
-        is not None
-    )
-    if not has_accepted:
-        req.book.is_available = True
-
-    db.session.commit()
-    return jsonify(message="rejected", id=req.id, status=req.status), 200
+@bp.patch("/<int:request_id>/reject")
+@login_required
+def donor_reject(request_id):
+    result = transition_request(request_id, REJECTED, donor_id=session["user_id"])
+    return _transition_response(result, "rejected")
@@ -1,8 +1,21 @@
-from flask import Blueprint, jsonify, request, session
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, session
+from sqlalchemy import select, tuple_
+
 from ...extensions import db
+from ...http_cache import make_etag, not_modified, query_fingerprint, with_etag
 from ...models import Book
+from ...pagination import encode_cursor, decode_cursor, parse_limit
 from ..auth.decorators import login_required
-from sqlalchemy import or_
+from ...services.book_search import apply_text_search, cached_search, count_search_results, COUNT_MODES
+from ...services.book_indexes import fuzzy_index, prefix_index
+from ...services.generations import BOOKS, current_generation
+from ...services.book_import import (
+    FORMATS, ON_DUPLICATE, REQUIRED_FIELDS,
+    clean_book_fields, detect_format, iter_records, import_books as run_book_import,
+)
+from ...text import normalize_text
 
 bp = Blueprint("books", __name__, url_prefix="/books")
 
@@ -18,24 +31,16 @@ def ping_books():
 def create_book():
     data = request.get_json(silent=True) or {}
 
-    title = (data.get("title") or "").strip()
-    author = (data.get("author") or "").strip()
-    genre = (data.get("genre") or "").strip() or None
-    language = (data.get("language") or "").strip() or None
-    description = (data.get("description") or "").strip() or None
-
-    if not title or not author:
+    # mismas reglas que el import masivo (services.book_import)
+    fields, missing = clean_book_fields(data)
+    if missing:
         return jsonify(
             error="missing_fields",
-            required=["title", "author"]
+            required=REQUIRED_FIELDS
         ), 400
 
     book = Book(
-        title=title,
-        author=author,
-        genre=genre,
-        language=language,
-        description=description,
+        **fields,
         donor_id=session["user_id"],  # 🔐 viene de la sesión
         is_available=True
     )
@@ -51,26 +56,142 @@ def create_book():
         donor_id=book.donor_id
     ), 201
 
+@bp.post("/import")
+@login_required
+def import_books():
+    """
+    Alta masiva de libros del usuario desde CSV o JSONL: fichero multipart
+    (`file`) o el cuerpo tal cual. Se procesa en streaming, por lotes.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+
+    fmt = (request.args.get("format") or "").strip().lower() or detect_format(filename, content_type)
+    if fmt not in FORMATS:
+        return jsonify(error="bad_request", message="format must be csv|jsonl"), 400
+
+    on_duplicate = (request.args.get("on_duplicate") or "skip").strip().lower()
+    if on_duplicate not in ON_DUPLICATE:
+        return jsonify(error="bad_request", message="on_duplicate must be skip|upsert|insert"), 400
+
+    report = run_book_import(
+        iter_records(stream, fmt),
+        donor_id=session["user_id"],
+        batch_size=current_app.config.get("BOOK_IMPORT_BATCH_SIZE", 1000),
+        on_duplicate=on_duplicate,
+        max_errors=current_app.config.get("BOOK_IMPORT_MAX_ERRORS", 100),
+    )
+    return jsonify(report.to_dict()), 200
+
+
+# -----------------------------
+# Campos: fields=title,author,... se traduce a select(columnas); las filas
+# son tuplas ligeras, sin instancias ORM ni identity map
+# -----------------------------
+BOOK_COLUMNS = {
+    name: getattr(Book, name)
+    for name in (
+        "id", "title", "author", "genre", "language", "description", "cover_path",
+        "is_available", "pending_count", "accepted_count", "donor_id", "created_at", "updated_at",
+    )
+}
+SUMMARY_FIELDS = (
+    "id", "title", "author", "genre", "language", "is_available", "pending_count", "donor_id", "created_at",
+)
+DETAIL_FIELDS = tuple(BOOK_COLUMNS)
+
+
+def _parse_fields(default: tuple[str, ...]) -> tuple[str, ...]:
+    """fields= de la query string (id siempre incluido). ValueError si hay campos desconocidos."""
+    raw = request.args.get("fields")
+    if raw is None or not raw.strip():
+        return default
+
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in BOOK_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", *fields]))
+
+
+def _fields_error(exc: ValueError):
+    return jsonify(error="bad_request", message=str(exc), allowed=list(BOOK_COLUMNS)), 400
+
+
+def _columns(fields, *internal: str) -> list:
+    """Columnas a seleccionar: las pedidas + las que necesita la consulta (cursor, score)."""
+    return [BOOK_COLUMNS[name] for name in dict.fromkeys((*fields, *internal))]
+
+
+def _catalog_etag(generation: int | None = None) -> str:
+    """
+    Listado y búsqueda: cualquier escritura en books sube la generación, así
+    que (generación, query string) identifica el cuerpo sin ejecutar la consulta.
+    """
+    if generation is None:
+        generation = current_generation(BOOKS)
+    return make_etag("books", generation, query_fingerprint())
+
+
+def _serialize(row, fields) -> dict:
+    out = {}
+    for name in fields:
+        value = getattr(row, name)
+        out[name] = value.isoformat() if isinstance(value, datetime) else value
+    return out
+
+
 @bp.get("/")
 def list_books():
-    books = Book.query.order_by(Book.created_at.desc()).all()
+    """
+    Keyset pagination sobre (created_at, id): la página N cuesta lo mismo
+    que la primera (usa ix_books_created_at_id, sin OFFSET).
+    """
+    try:
+        limit = parse_limit(request.args.get("limit"), default=50, maximum=200)
+    except ValueError:
+        return jsonify(error="bad_request", message="limit must be an integer"), 400
 
-    return jsonify(
-        items=[
-            {
-                "id": b.id,
-                "title": b.title,
-                "author": b.author,
-                "genre": b.genre,
-                "language": b.language,
-                "is_available": b.is_available,
-                "donor_id": b.donor_id,
-                "created_at": b.created_at.isoformat() if b.created_at else None,
-            }
-            for b in books
-        ]
-    ), 200
+    try:
+        fields = _parse_fields(SUMMARY_FIELDS)
+    except ValueError as exc:
+        return _fields_error(exc)
+
+    etag = _catalog_etag()
+    cached = not_modified(etag, "BOOKS_LIST_MAX_AGE")
+    if cached is not None:
+        return cached
+
+    query = db.session.query(*_columns(fields, "created_at", "id"))
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after_created, after_id = decode_cursor(cursor, (datetime, int))
+        except ValueError:
+            return jsonify(error="bad_request", message="invalid cursor"), 400
+        query = query.filter(tuple_(Book.created_at, Book.id) < (after_created, after_id))
 
+    books = (
+        query.order_by(Book.created_at.desc(), Book.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(books) > limit:
+        books = books[:limit]
+        next_cursor = encode_cursor(books[-1].created_at, books[-1].id)
+
+    response = jsonify(
+        items=[_serialize(b, fields) for b in books],
+        limit=limit,
+        next_cursor=next_cursor,
+    )
+    return with_etag(response, etag, "BOOKS_LIST_MAX_AGE"), 200
 
 
 def _parse_bool(value: str | None):
@@ -93,6 +214,23 @@ def search_books():
     available = _parse_bool(request.args.get("available"))
     donor = request.args.get("donor")  # donor_id opcional
 
+    sort = (request.args.get("sort") or "recent").strip().lower()
+    if sort not in ("recent", "relevance"):
+        return jsonify(error="bad_request", message="sort must be recent|relevance"), 400
+
+    count_mode = (request.args.get("count") or "exact").strip().lower()
+    if count_mode not in COUNT_MODES:
+        return jsonify(error="bad_request", message="count must be exact|estimate|none"), 400
+
+    fuzzy = _parse_bool(request.args.get("fuzzy")) is True
+    if fuzzy and not q:
+        return jsonify(error="bad_request", message="fuzzy search requires q"), 400
+
+    try:
+        fields = _parse_fields(SUMMARY_FIELDS)
+    except ValueError as exc:
+        return _fields_error(exc)
+
     # Paginación
     try:
         page = int(request.args.get("page", 1))
@@ -103,77 +241,240 @@ def search_books():
     page = max(page, 1)
     per_page = min(max(per_page, 1), 100)
 
-    query = Book.query
+    # donor opcional
+    donor_id = None
+    if donor:
+        try:
+            donor_id = int(donor)
+        except ValueError:
+            return jsonify(error="bad_request", message="donor must be an integer"), 400
 
-    # Texto: title OR author
-    if q:
-        like = f"%{q}%"
-        query = query.filter(or_(Book.title.ilike(like), Book.author.ilike(like)))
+    generation = current_generation(BOOKS)
+    etag = _catalog_etag(generation)
+    cached = not_modified(etag, "BOOKS_LIST_MAX_AGE")
+    if cached is not None:
+        return cached
+
+    # misma búsqueda escrita distinta ("Novela" / " novela ") -> misma entrada
+    filters = (normalize_text(q), normalize_text(genre), normalize_text(language), available, donor_id)
+    key = (*filters, sort, count_mode, fuzzy, fields, page, per_page)
 
-    if genre:
-        query = query.filter(Book.genre == genre)
+    def compute():
+        return _search_payload(q, filters, sort, count_mode, fuzzy, fields, page, per_page)
 
-    if language:
-        query = query.filter(Book.language == language)
+    payload, _ = cached_search(key, compute, generation=generation)
+    return with_etag(jsonify(payload), etag, "BOOKS_LIST_MAX_AGE"), 200
+
+
+def _search_payload(q, filters, sort, count_mode, fuzzy, fields, page, per_page) -> dict:
+    _, genre_norm, language_norm, available, donor_id = filters
+
+    query = Book.query
+
+    # igualdad sobre columnas normalizadas ("Novela" == "novela", "Español" == "espanol")
+    if genre_norm:
+        query = query.filter(Book.genre_norm == genre_norm)
+
+    if language_norm:
+        query = query.filter(Book.language_norm == language_norm)
 
     # disponible
     if available is not None:
         query = query.filter(Book.is_available.is_(available))
 
-    # donor opcional
-    if donor:
-        try:
-            donor_id = int(donor)
-        except ValueError:
-            return jsonify(error="bad_request", message="donor must be an integer"), 400
-
+    if donor_id is not None:
         query = query.filter(Book.donor_id == donor_id)
 
+    # Texto con erratas: candidatos del índice de trigramas en memoria
+    if fuzzy:
+        filtered = any(v not in (None, "") for v in filters[1:])
+        return _fuzzy_search(query, q, page, per_page, fields, filtered=filtered)
+
+    # Texto: índice FTS5 (title, author, description) o LIKE si no hay FTS
+    ordered = False
+    if q:
+        query, ordered = apply_text_search(query, q, by_relevance=(sort == "relevance"))
+
+    # conteo (antes de ordenar: el orden no cambia el total)
+    count_key = (q, genre_norm, language_norm, available, donor_id)
+    filtered = any(v not in (None, "") for v in count_key)
+    total, total_is_estimate = count_search_results(query, count_key, count_mode, filtered=filtered)
+
     # orden
-    query = query.order_by(Book.created_at.desc())
+    if not ordered:
+        query = query.order_by(Book.created_at.desc())
+
+    # per_page + 1 para saber si hay más sin depender del total
+    books = (
+        query.with_entities(*_columns(fields))
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+        .all()
+    )
+    has_more = len(books) > per_page
+    books = books[:per_page]
 
-    total = query.count()
-    books = query.offset((page - 1) * per_page).limit(per_page).all()
+    return dict(
+        items=[_serialize(b, fields) for b in books],
+        total=total,
+        total_is_estimate=total_is_estimate,
+        has_more=has_more,
+        page=page,
+        per_page=per_page,
+    )
 
-    return jsonify(
-        items=[
-            {
-                "id": b.id,
-                "title": b.title,
-                "author": b.author,
-                "genre": b.genre,
-                "language": b.language,
-                "is_available": b.is_available,
-                "donor_id": b.donor_id,
-                "created_at": b.created_at.isoformat() if b.created_at else None,
+
+def _fuzzy_search(query, q: str, page: int, per_page: int, fields, *, filtered: bool) -> dict:
+    """
+    El índice de trigramas ordena los candidatos y, con filtros, SQL se
+    queda con los que cumplen (Book.id IN candidatos, solo la PK). Si
+    quedan menos de FUZZY_MAX_RESULTS y el índice tenía más, se amplían
+    los candidatos (x4) hasta FUZZY_MAX_CANDIDATES. Después solo se cargan
+    las filas de la página. Si se llegó al tope, total es una cota
+    inferior (total_is_estimate).
+    """
+    cap = current_app.config.get("FUZZY_MAX_RESULTS", 200)
+    max_candidates = max(current_app.config.get("FUZZY_MAX_CANDIDATES", 5000), cap)
+
+    wanted = cap
+    while True:
+        ranked = fuzzy_index().search(q, limit=wanted, candidates=wanted)
+        if filtered and ranked:
+            keep = {
+                book_id
+                for (book_id,) in query.filter(Book.id.in_([i for i, _ in ranked])).with_entities(Book.id)
             }
-            for b in books
+            scored = [item for item in ranked if item[0] in keep]
+        else:
+            scored = ranked
+        # el índice ya no da más, o no hay más margen
+        if len(scored) >= cap or len(ranked) < wanted or wanted >= max_candidates:
+            break
+        wanted = min(wanted * 4, max_candidates)
+
+    scored = scored[:cap]
+    scores = dict(scored)
+
+    start = (page - 1) * per_page
+    page_ids = [book_id for book_id, _ in scored[start:start + per_page]]
+
+    rows = {}
+    if page_ids:
+        found = db.session.execute(select(*_columns(fields, "id")).where(Book.id.in_(page_ids)))
+        rows = {b.id: b for b in found}
+
+    return dict(
+        items=[
+            dict(_serialize(rows[book_id], fields), score=round(scores[book_id], 1))
+            for book_id in page_ids if book_id in rows
         ],
-        total=total,
+        total=len(scored),
+        total_is_estimate=len(scored) >= cap,
+        has_more=len(scored) > start + per_page,
         page=page,
         per_page=per_page,
-    ), 200
+        fuzzy=True,
+    )
+
+
+@bp.get("/suggest")
+def suggest_books():
+    """
+    Autocompletado de títulos y autores para el buscador. Se resuelve en
+    memoria (PrefixIndex): ninguna consulta a la BD por pulsación.
+    """
+    prefix = (request.args.get("prefix") or "").strip()
+
+    kind = (request.args.get("type") or "").strip().lower() or None
+    if kind not in (None, "title", "author"):
+        return jsonify(error="bad_request", message="type must be title|author"), 400
+
+    try:
+        limit = parse_limit(request.args.get("limit"), default=10, maximum=25)
+    except ValueError:
+        return jsonify(error="bad_request", message="limit must be an integer"), 400
+
+    items = prefix_index().suggest(prefix, limit=limit, kind=kind) if prefix else []
+    return jsonify(prefix=prefix, items=items), 200
 
 
 @bp.get("/<int:book_id>")
 def get_book(book_id: int):
-    from app.extensions import db
-    book = db.session.get(Book, book_id)
+    try:
+        fields = _parse_fields(DETAIL_FIELDS)
+    except ValueError as exc:
+        return _fields_error(exc)
+
+    book = db.session.execute(select(*_columns(fields, "updated_at")).where(Book.id == book_id)).first()
 
     if not book:
         return jsonify(error="not_found"), 404
 
+    # toda escritura (ORM o Core) renueva updated_at (onupdate)
+    etag = make_etag("book", book.id, book.updated_at.isoformat(), ",".join(fields))
+    cached = not_modified(etag, "BOOK_DETAIL_MAX_AGE")
+    if cached is not None:
+        return cached
+
+    return with_etag(jsonify(_serialize(book, fields)), etag, "BOOK_DETAIL_MAX_AGE"), 200
+
+
+BATCH_MAX_IDS = 200
+
+
+def _parse_ids(raw) -> list[int]:
+    """"1,2,3" o [1, 2, 3] -> ids sin repetir, en el orden recibido. ValueError si no son enteros."""
+    if isinstance(raw, str):
+        raw = [part for part in raw.split(",") if part.strip()]
+    if not isinstance(raw, list):
+        raise ValueError("ids must be a list")
+
+    ids = []
+    for value in raw:
+        if isinstance(value, bool):
+            raise ValueError("ids must be integers")
+        ids.append(int(value))
+    return list(dict.fromkeys(ids))
+
+
+@bp.route("/batch", methods=["GET", "POST"])
+def get_books_batch():
+    """
+    Varios libros en una petición: GET ?ids=1,2,3 o POST {"ids": [...]}
+    (o la lista sola: POST [1, 2, 3]).
+    Un solo SELECT ... WHERE id IN (...); mismo formato que GET /books/<id>,
+    en el orden pedido, y los ids inexistentes en `missing`.
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if isinstance(body, list):
+            raw = body
+        elif isinstance(body, dict) or body is None:
+            raw = (body or {}).get("ids")
+        else:
+            return jsonify(error="bad_request", message="body must be a JSON object or list"), 400
+    else:
+        raw = request.args.get("ids") or ""
+
+    try:
+        ids = _parse_ids(raw)
+    except (TypeError, ValueError):
+        return jsonify(error="bad_request", message="ids must be a list of integers"), 400
+
+    if not ids:
+        return jsonify(error="bad_request", message="ids is required"), 400
+    if len(ids) > BATCH_MAX_IDS:
+        return jsonify(error="bad_request", message=f"at most {BATCH_MAX_IDS} ids"), 400
+
+    try:
+        fields = _parse_fields(DETAIL_FIELDS)
+    except ValueError as exc:
+        return _fields_error(exc)
+
+    found = {b.id: b for b in db.session.execute(select(*_columns(fields)).where(Book.id.in_(ids)))}
+
     return jsonify(
-        id=book.id,
-        title=book.title,
-        author=book.author,
-        genre=book.genre,
-        language=book.language,
-        description=book.description,
-        cover_path=book.cover_path,
-        is_available=book.is_available,
-        donor_id=book.donor_id,
-        created_at=book.created_at.isoformat() if book.created_at else None,
-        updated_at=book.updated_at.isoformat() if book.updated_at else None,
+        items=[_serialize(found[i], fields) for i in ids if i in found],
+        missing=[i for i in ids if i not in found],
     ), 200
 
@@ -0,0 +1,64 @@
+import click
+from flask.cli import AppGroup
+
+books_cli = AppGroup("books", help="Mantenimiento del catálogo de libros.")
+
+
+@books_cli.command("reindex")
+def reindex_books():
+    """Reconstruye el índice de búsqueda (FTS5) desde la tabla books."""
+    from .services.book_search import rebuild_fts
+
+    if rebuild_fts():
+        click.echo("books_fts rebuilt")
+    else:
+        click.echo("FTS5 not available on this database; search uses LIKE fallback")
+
+
+@books_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--donor-id", type=int, required=True, help="Usuario al que se asignan los libros.")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Por defecto, según la extensión.")
+@click.option("--on-duplicate", type=click.Choice(["skip", "upsert", "insert"]), default="skip", show_default=True)
+@click.option("--batch-size", type=int, default=None, help="Filas por INSERT/commit (BOOK_IMPORT_BATCH_SIZE).")
+def import_books_cmd(path, donor_id, fmt, on_duplicate, batch_size):
+    """Importa libros desde un CSV o JSONL en streaming, por lotes."""
+    import json
+
+    from flask import current_app
+
+    from .services.book_import import detect_format, import_books, iter_records
+
+    fmt = fmt or detect_format(path, None)
+    if fmt is None:
+        raise click.UsageError("cannot infer format from extension; use --format")
+
+    def progress(report):
+        click.echo(
+            f"{report.read} read, {report.inserted} inserted, {report.updated} updated, "
+            f"{report.skipped} skipped, {report.failed} failed",
+            err=True,
+        )
+
+    with open(path, "rb") as fh:
+        report = import_books(
+            iter_records(fh, fmt),
+            donor_id=donor_id,
+            batch_size=batch_size or current_app.config.get("BOOK_IMPORT_BATCH_SIZE", 1000),
+            on_duplicate=on_duplicate,
+            max_errors=current_app.config.get("BOOK_IMPORT_MAX_ERRORS", 100),
+            progress=progress,
+        )
+
+    click.echo(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+
+
+@books_cli.command("rebuild-counters")
+def rebuild_counters():
+    """Recalcula pending_count/accepted_count de books desde book_requests."""
+    from .extensions import db
+    from .services.request_transitions import rebuild_request_counters
+
+    changed = rebuild_request_counters()
+    db.session.commit()
+    click.echo(f"{changed} books updated")
@@ -6,13 +6,15 @@ def _bool(value: str | None, default: bool = False) -> bool:
         return default
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
-def _default_sqlite_uri() -> str:
+def _instance_path(filename: str) -> str:
     # app/ -> proyecto/
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     instance_dir = os.path.join(project_root, "instance")
     os.makedirs(instance_dir, exist_ok=True)
-    db_path = os.path.join(instance_dir, "ventana_sabia.db")
-    return "sqlite:///" + db_path
+    return os.path.join(instance_dir, filename)
+
+def _default_sqlite_uri() -> str:
+    return "sqlite:///" + _instance_path("ventana_sabia.db")
 
 @dataclass(frozen=True)
 class BaseConfig:
@@ -24,6 +26,59 @@ class BaseConfig:
     SESSION_COOKIE_SAMESITE: str = "Lax"
     SESSION_COOKIE_SECURE: bool = _bool(os.getenv("SESSION_COOKIE_SECURE"), default=False)
 
+    # Security events: escritura asíncrona por lotes
+    SECURITY_EVENTS_ASYNC: bool = _bool(os.getenv("SECURITY_EVENTS_ASYNC"), default=True)
+    SECURITY_EVENTS_QUEUE_SIZE: int = int(os.getenv("SECURITY_EVENTS_QUEUE_SIZE", "10000"))
+    SECURITY_EVENTS_BATCH_SIZE: int = int(os.getenv("SECURITY_EVENTS_BATCH_SIZE", "200"))
+    SECURITY_EVENTS_FLUSH_MS: int = int(os.getenv("SECURITY_EVENTS_FLUSH_MS", "500"))
+    SECURITY_EVENTS_OVERFLOW: str = os.getenv("SECURITY_EVENTS_OVERFLOW", "drop")  # drop | sample | block
+    SECURITY_EVENTS_SAMPLE_RATE: int = int(os.getenv("SECURITY_EVENTS_SAMPLE_RATE", "10"))
+
+    # Segundos por bucket para plegar eventos idénticos (0 = una fila por evento)
+    SECURITY_EVENTS_AGGREGATE_WINDOW: int = int(os.getenv("SECURITY_EVENTS_AGGREGATE_WINDOW", "10"))
+
+    # Rate limit: memory (por proceso) | sqlite (compartido en el host) | redis
+    RATELIMIT_ENABLED: bool = _bool(os.getenv("RATELIMIT_ENABLED"), default=True)
+    RATELIMIT_BACKEND: str = os.getenv("RATELIMIT_BACKEND", "memory")
+    RATELIMIT_STORAGE_PATH: str = os.getenv("RATELIMIT_STORAGE_PATH", _instance_path("ratelimit.sqlite3"))
+    RATELIMIT_REDIS_URL: str | None = os.getenv("RATELIMIT_REDIS_URL")
+    RATELIMIT_SWEEP_INTERVAL: int = int(os.getenv("RATELIMIT_SWEEP_INTERVAL", "60"))
+
+    # Conteos de /books/search cacheados por combinación de filtros
+    BOOKS_COUNT_CACHE_SIZE: int = int(os.getenv("BOOKS_COUNT_CACHE_SIZE", "2048"))
+    BOOKS_COUNT_CACHE_TTL: int = int(os.getenv("BOOKS_COUNT_CACHE_TTL", "300"))
+
+    # Resultados completos de /books/search (clave normalizada + generación de books)
+    BOOKS_SEARCH_CACHE_ENABLED: bool = _bool(os.getenv("BOOKS_SEARCH_CACHE_ENABLED"), True)
+    BOOKS_SEARCH_CACHE_SIZE: int = int(os.getenv("BOOKS_SEARCH_CACHE_SIZE", "512"))
+    BOOKS_SEARCH_CACHE_TTL: int = int(os.getenv("BOOKS_SEARCH_CACHE_TTL", "60"))
+
+    # Índices de libros en memoria (fuzzy, autocompletado): resincronización con la BD
+    BOOK_INDEX_REFRESH_SEC: int = int(os.getenv("BOOK_INDEX_REFRESH_SEC", "60"))
+    # construcción en segundo plano en vez de dentro de la primera búsqueda
+    BOOK_INDEX_WARMUP: bool = _bool(os.getenv("BOOK_INDEX_WARMUP"), default=True)
+    FUZZY_MAX_RESULTS: int = int(os.getenv("FUZZY_MAX_RESULTS", "200"))
+    # con filtros, candidatos del índice que se llegan a comprobar en SQL
+    FUZZY_MAX_CANDIDATES: int = int(os.getenv("FUZZY_MAX_CANDIDATES", "5000"))
+
+    # Import masivo de libros (flask books import, POST /books/import)
+    BOOK_IMPORT_BATCH_SIZE: int = int(os.getenv("BOOK_IMPORT_BATCH_SIZE", "1000"))
+    BOOK_IMPORT_MAX_ERRORS: int = int(os.getenv("BOOK_IMPORT_MAX_ERRORS", "100"))
+
+    # Conteos del dashboard admin (/api/admin/stats)
+    ADMIN_STATS_CACHE_TTL: int = int(os.getenv("ADMIN_STATS_CACHE_TTL", "10"))
+
+    # Cache-Control de GET /books/ (listado, búsqueda) y /books/<id>; 0 = revalidar siempre (ETag)
+    BOOKS_LIST_MAX_AGE: int = int(os.getenv("BOOKS_LIST_MAX_AGE", "0"))
+    BOOK_DETAIL_MAX_AGE: int = int(os.getenv("BOOK_DETAIL_MAX_AGE", "0"))
+
+    # /metrics (formato Prometheus): Bearer METRICS_TOKEN o sesión admin.
+    # Con gunicorn, METRICS_MULTIPROC_DIR (vaciado al arrancar) agrega los workers
+    METRICS_ENABLED: bool = _bool(os.getenv("METRICS_ENABLED"), default=True)
+    METRICS_TOKEN: str | None = os.getenv("METRICS_TOKEN")
+    METRICS_MULTIPROC_DIR: str | None = os.getenv("METRICS_MULTIPROC_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    METRICS_FLUSH_SEC: int = int(os.getenv("METRICS_FLUSH_SEC", "5"))
+
 class DevelopmentConfig(BaseConfig):
     DEBUG: bool = True
 
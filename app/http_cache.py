@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import hashlib
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte (hash corto) a partir de lo que determina el cuerpo."""
+    raw = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def query_fingerprint() -> str:
+    """Query string canónica: ?a=1&b=2 y ?b=2&a=1 dan el mismo ETag."""
+    # re-codificada: un valor con "&" o "=" no puede imitar otro parámetro
+    return urlencode(sorted(request.args.items(multi=True)))
+
+
+def cache_control(response: Response, max_age_key: str) -> Response:
+    """
+    Cache-Control por endpoint (segundos en config). Las respuestas dependen
+    de la sesión: siempre private; con 0 el cliente revalida cada vez
+    (If-None-Match -> 304 barato).
+    """
+    max_age = int(current_app.config.get(max_age_key, 0))
+    response.headers["Cache-Control"] = f"private, max-age={max_age}" if max_age > 0 else "private, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def not_modified(etag: str, max_age_key: str) -> Response | None:
+    """304 vacío si If-None-Match ya tiene este ETag; None si hay que responder entero."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return cache_control(response, max_age_key)
+
+
+def with_etag(response: Response, etag: str, max_age_key: str) -> Response:
+    response.set_etag(etag)
+    return cache_control(response, max_age_key)
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import atexit
+import glob
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from flask import Flask, Response, abort, current_app, g, has_request_context, request, session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nombre -> (tipo, ayuda); solo se exporta lo declarado aquí
+METRICS = {
+    "http_requests_total": ("counter", "Requests atendidas por endpoint, método y status."),
+    "http_request_duration_seconds": ("histogram", "Latencia de la request completa."),
+    "db_queries_total": ("counter", "Sentencias SQL ejecutadas por endpoint."),
+    "db_query_duration_seconds_total": ("counter", "Tiempo acumulado en la BD por endpoint."),
+    "rate_limit_decisions_total": ("counter", "Decisiones del rate limiter por regla."),
+    "security_events_total": ("counter", "Eventos de seguridad registrados por tipo."),
+    "security_event_writer_events_total": ("counter", "Eventos del writer asíncrono por resultado."),
+    "security_event_writer_flushes_total": ("counter", "Vaciados de cola del writer asíncrono."),
+}
+
+
+class MetricsRegistry:
+    """
+    Contadores e histogramas en memoria de este proceso (thread-safe).
+    Las etiquetas son tuplas ordenadas de (nombre, valor).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters: dict[tuple, float] = {}
+        self._histograms: dict[tuple, list] = {}  # [por bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_total(self, name: str, value: float, **labels) -> None:
+        """Contador cuyo total lleva otro componente (p. ej. WriterStats)."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                hist[index] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counters": [[n, [list(l) for l in labels], v] for (n, labels), v in self._counters.items()],
+                "histograms": [[n, [list(l) for l in labels], list(h)] for (n, labels), h in self._histograms.items()],
+            }
+
+
+# -------------------------------------------------
+# Agregación y formato de exposición
+# -------------------------------------------------
+def merge_snapshots(snapshots) -> dict:
+    """Suma los snapshots de varios procesos (mismos buckets)."""
+    counters: dict[tuple, float] = {}
+    histograms: dict[tuple, list] = {}
+    buckets = None
+
+    for snap in snapshots:
+        buckets = buckets or snap["buckets"]
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, hist in snap["histograms"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            acc = histograms.get(key)
+            histograms[key] = list(hist) if acc is None else [a + b for a, b in zip(acc, hist)]
+
+    return {"buckets": buckets or list(LATENCY_BUCKETS), "counters": counters, "histograms": histograms}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_text(merged: dict) -> str:
+    """Formato de exposición de Prometheus (text/plain; version=0.0.4)."""
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        if kind == "counter":
+            series = sorted((k, v) for k, v in merged["counters"].items() if k[0] == name)
+        else:
+            series = sorted((k, v) for k, v in merged["histograms"].items() if k[0] == name)
+        if not series:
+            continue
+
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (_, labels), value in series:
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(merged["buckets"], value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, (('le', '+Inf'),))} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------------------------------
+# Multiproceso (gunicorn): un fichero por worker
+# -------------------------------------------------
+class MultiprocessStore:
+    """
+    Cada proceso vuelca su snapshot en <dir>/metrics_<pid>.json (escritura
+    atómica con os.replace, como mucho cada `flush_sec`) y /metrics suma
+    todos los ficheros. El directorio debe vaciarse al arrancar el master:
+    los ficheros de workers muertos siguen contando (contadores acumulados).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        registry: MetricsRegistry,
+        flush_sec: float = 5.0,
+        collect: Callable[[], None] | None = None,
+    ):
+        self.path = path
+        self.registry = registry
+        self.flush_sec = float(flush_sec)
+        # totales que llevan otros componentes: se copian antes de cada volcado
+        self.collect_hook = collect
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self) -> str:
+        return os.path.join(self.path, f"metrics_{os.getpid()}.json")
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_sec:
+            return
+        with self._lock:
+            self._last_flush = now
+            target = self._file()
+            tmp = f"{target}.tmp"
+            try:
+                if self.collect_hook is not None:
+                    self.collect_hook()
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    json.dump(self.registry.snapshot(), fh)
+                os.replace(tmp, target)
+            except OSError:
+                log.exception("metrics: could not write %s", target)
+
+    def collect(self) -> list[dict]:
+        snapshots = []
+        for path in glob.glob(os.path.join(self.path, "metrics_*.json")):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    snapshots.append(json.load(fh))
+            except (OSError, ValueError):
+                continue  # un worker a medio escribir o ya borrado
+        return snapshots
+
+
+# -------------------------------------------------
+# Acceso desde el resto de la app
+# -------------------------------------------------
+def _registry() -> MetricsRegistry | None:
+    return current_app.extensions.get("metrics")
+
+
+def count(name: str, value: float = 1.0, **labels) -> None:
+    """Best-effort: sin registry (métricas apagadas) no hace nada."""
+    registry = _registry()
+    if registry is not None:
+        registry.inc(name, value, **labels)
+
+
+# SQL por request: los listeners son globales (cualquier Engine) y acumulan
+# en g mientras haya una request en curso. El inicio va en el contexto de
+# ejecución: si la sentencia falla no queda nada colgando de la conexión
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    if has_request_context() and "metrics_sql" in g:
+        g.metrics_sql[0] += 1
+        g.metrics_sql[1] += elapsed
+
+
+def _collect_writer_stats(registry: MetricsRegistry, writer) -> None:
+    if writer is None:
+        return
+    stats = writer.stats.to_dict()
+    for outcome in ("enqueued", "written", "dropped", "sampled_out", "errors"):
+        registry.set_total("security_event_writer_events_total", stats[outcome], outcome=outcome)
+    registry.set_total("security_event_writer_flushes_total", stats["flushes"])
+
+
+def _authorize_scrape() -> None:
+    """Bearer METRICS_TOKEN (scraper) o sesión de admin (navegador)."""
+    token = current_app.config.get("METRICS_TOKEN")
+    header = request.headers.get("Authorization", "")
+    if token and header.startswith("Bearer ") and hmac.compare_digest(header[7:].encode(), token.encode()):
+        return
+
+    if not session.get("user_id"):
+        abort(401)
+
+    from app.security.principal import current_principal
+    user = current_principal()
+    if getattr(user, "role", None) != "admin" or getattr(user, "is_blocked", False):
+        abort(403)
+
+
+def init_metrics(app: Flask) -> MetricsRegistry | None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return None
+
+    registry = MetricsRegistry()
+    app.extensions["metrics"] = registry
+
+    # cada worker copia los totales de su writer en su propio snapshot
+    writer = app.extensions.get("security_event_writer")
+
+    def collect():
+        _collect_writer_stats(registry, writer)
+
+    store = None
+    path = app.config.get("METRICS_MULTIPROC_DIR")
+    if path:
+        store = MultiprocessStore(
+            path, registry, flush_sec=app.config.get("METRICS_FLUSH_SEC", 5), collect=collect,
+        )
+        app.extensions["metrics_store"] = store
+        atexit.register(store.flush, True)
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql = [0, 0.0]
+
+    @app.after_request
+    def _metrics_record(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+
+        # endpoint (no path): cardinalidad acotada
+        endpoint = request.endpoint or "unmatched"
+        elapsed = time.perf_counter() - start
+        registry.inc("http_requests_total", endpoint=endpoint, method=request.method, status=response.status_code)
+        registry.observe(
+            "http_request_duration_seconds", elapsed,
+            endpoint=endpoint, method=request.method, status=response.status_code,
+        )
+
+        queries, db_time = g.pop("metrics_sql", (0, 0.0))
+        if queries:
+            registry.inc("db_queries_total", queries, endpoint=endpoint)
+            registry.inc("db_query_duration_seconds_total", db_time, endpoint=endpoint)
+
+        if store is not None:
+            store.flush()
+        return response
+
+    @app.get("/metrics")
+    def metrics():
+        _authorize_scrape()
+
+        if store is not None:
+            store.flush(force=True)
+            merged = merge_snapshots(store.collect())
+        else:
+            collect()
+            merged = merge_snapshots([registry.snapshot()])
+
+        return Response(render_text(merged), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    return registry
@@ -3,6 +3,7 @@ from .book import Book
 from .book_request import BookRequest
 from .admin_action import AdminAction
 from .security_event import SecurityEvent  # noqa: F401
+from .table_generation import TableGeneration  # noqa: F401
 
 
 __all__ = ["User", "Book", "BookRequest", "AdminAction"]
\ No newline at end of file
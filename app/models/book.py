@@ -1,5 +1,9 @@
 from datetime import datetime
+
+from sqlalchemy import event
+
 from ..extensions import db
+from ..text import normalize_text
 
 
 class Book(db.Model):
@@ -7,10 +11,17 @@ class Book(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    title = db.Column(db.String(255), nullable=False, index=True)
-    author = db.Column(db.String(255), nullable=False, index=True)
-    genre = db.Column(db.String(100), index=True)
-    language = db.Column(db.String(50), index=True)
+    title = db.Column(db.String(255), nullable=False)
+    author = db.Column(db.String(255), nullable=False)
+    genre = db.Column(db.String(100))
+    language = db.Column(db.String(50))
+
+    # Columnas sombra normalizadas (sin acentos, casefold): búsquedas y
+    # filtros comparan contra estas para seguir usando índice
+    title_norm = db.Column(db.String(255), index=True)
+    author_norm = db.Column(db.String(255), index=True)
+    genre_norm = db.Column(db.String(100), index=True)
+    language_norm = db.Column(db.String(50), index=True)
 
     description = db.Column(db.Text)
     cover_path = db.Column(db.String(255))
@@ -24,6 +35,11 @@ class Book(db.Model):
 
     is_available = db.Column(db.Boolean, nullable=False, default=True)
 
+    # contadores de book_requests por estado, mantenidos en la misma
+    # transacción que cada transición (services.request_transitions)
+    pending_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    accepted_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     created_at = db.Column(
         db.DateTime,
         nullable=False,
@@ -39,3 +55,20 @@ class Book(db.Model):
 
     # relación ORM
     donor = db.relationship("User", backref="books")
+
+    __table_args__ = (
+        # keyset pagination de GET /books/ (ORDER BY created_at DESC, id DESC)
+        db.Index("ix_books_created_at_id", "created_at", "id"),
+    )
+
+    def refresh_normalized(self) -> None:
+        self.title_norm = normalize_text(self.title)
+        self.author_norm = normalize_text(self.author)
+        self.genre_norm = normalize_text(self.genre)
+        self.language_norm = normalize_text(self.language)
+
+
+@event.listens_for(Book, "before_insert")
+@event.listens_for(Book, "before_update")
+def _book_refresh_normalized(mapper, connection, target: Book) -> None:
+    target.refresh_normalized()
@@ -1,6 +1,48 @@
 from datetime import datetime
+
+from sqlalchemy.orm import validates
+from sqlalchemy.types import TypeDecorator
+
 from ..extensions import db
 
+# Estados canónicos (API, código) -> código en BD
+PENDING = "pending"
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+CANCELLED = "cancelled"
+
+STATUS_CODES = {PENDING: 1, ACCEPTED: 2, REJECTED: 3, CANCELLED: 4}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+REQUEST_STATUSES = frozenset(STATUS_CODES)
+
+
+def normalize_status(value: str) -> str:
+    """"PENDING" / " Pending " -> "pending". ValueError si no es un estado válido."""
+    status = str(value).strip().lower()
+    if status not in STATUS_CODES:
+        raise ValueError(f"invalid request status: {value!r}")
+    return status
+
+
+class RequestStatus(TypeDecorator):
+    """
+    Estado guardado como SmallInteger; en Python siempre el string canónico.
+    También se aplica a los parámetros de filtros (status == "PENDING").
+    """
+
+    impl = db.SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return STATUS_CODES[normalize_status(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return STATUS_NAMES[value]
+
 
 class BookRequest(db.Model):
     __tablename__ = "book_requests"
@@ -10,23 +52,21 @@ class BookRequest(db.Model):
     book_id = db.Column(
         db.Integer,
         db.ForeignKey("books.id"),
-        nullable=False,
-        index=True
+        nullable=False
     )
 
     requester_id = db.Column(
         db.Integer,
         db.ForeignKey("users.id"),
-        nullable=False,
-        index=True
+        nullable=False
     )
 
     status = db.Column(
-        db.String(20),
+        RequestStatus(),
         nullable=False,
-        default="pending"
+        default=PENDING
     )
-    # pending | accepted | rejected | cancelled
+    # pending | accepted | rejected | cancelled (1..4 en BD)
 
     created_at = db.Column(
         db.DateTime,
@@ -41,5 +81,20 @@ class BookRequest(db.Model):
         onupdate=datetime.utcnow
     )
 
+    # índices según los filtros reales; book_id y requester_id van en
+    # cabeza, así que también sirven para los joins por FK
+    __table_args__ = (
+        db.Index("ix_book_requests_status_id", "status", "id"),
+        # filtros por libro/estado y bandeja del donante (GET /requests/incoming)
+        db.Index("ix_book_requests_book_id_status_created_at", "book_id", "status", "created_at"),
+        db.Index("ix_book_requests_requester_id_status", "requester_id", "status"),
+        # historial del solicitante (GET /requests/mine), más recientes primero
+        db.Index("ix_book_requests_requester_id_created_at", "requester_id", "created_at"),
+    )
+
     book = db.relationship("Book", backref="requests")
     requester = db.relationship("User", backref="book_requests")
+
+    @validates("status")
+    def _validate_status(self, key, value):
+        return normalize_status(value)
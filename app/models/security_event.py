@@ -31,3 +31,36 @@ class SecurityEvent(db.Model):
     ip = db.Column(db.String(64), nullable=True, index=True)
 
     details = db.Column(db.Text, nullable=True)
+
+    # Agregación: eventos idénticos dentro de un bucket se suman en una fila
+    count = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    first_seen = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_seen = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # solo filas agregadas: hash de AGGREGATE_KEY + inicio del bucket. El
+    # índice único hace atómico el upsert entre workers (NULL en filas sueltas)
+    agg_key = db.Column(db.String(40), nullable=True)
+    bucket_start = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        db.Index("ux_security_events_agg_key_bucket", "agg_key", "bucket_start", unique=True),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "event_type": self.event_type,
+            "status_code": self.status_code,
+            "endpoint": self.endpoint,
+            "blueprint": self.blueprint,
+            "method": self.method,
+            "path": self.path,
+            "user_id": self.user_id,
+            "role": self.role,
+            "ip": self.ip,
+            "details": self.details,
+            "count": self.count,
+            "first_seen": self.first_seen.isoformat() if self.first_seen else None,
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+        }
@@ -0,0 +1,14 @@
+from app.extensions import db
+
+
+class TableGeneration(db.Model):
+    """
+    Contador de cambios por tabla. Se incrementa en la misma transacción
+    que la escritura, así que todos los workers ven el mismo valor y sirve
+    para invalidar caches derivadas (conteos, resultados, ETags).
+    """
+
+    __tablename__ = "table_generations"
+
+    name = db.Column(db.String(64), primary_key=True)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values) -> str:
+    """Cursor opaco (base64url de JSON) con los valores de la última fila."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple[type, ...]) -> tuple:
+    """Inversa de encode_cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError("invalid cursor")
+
+    values = []
+    for value, typ in zip(payload, types):
+        if typ is datetime:
+            if not isinstance(value, str):
+                raise ValueError("invalid cursor")
+            values.append(datetime.fromisoformat(value))
+        elif typ is int:
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError("invalid cursor")
+            values.append(value)
+        else:
+            values.append(typ(value))
+    return tuple(values)
+
+
+def parse_limit(raw: str | None, default: int, maximum: int) -> int:
+    """limit de la query string, acotado a [1, maximum]. ValueError si no es entero."""
+    if raw is None or raw == "":
+        return default
+    return min(max(int(raw), 1), maximum)
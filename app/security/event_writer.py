@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+from flask import Flask
+
+from app.extensions import db
+from app.security.security_events import store_security_events
+
+log = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = {"drop", "sample", "block"}
+
+
+@dataclass
+class WriterStats:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0   # no llegaron a la BD (cola llena, muestreo o error)
+    sampled_out: int = 0
+    flushes: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class SecurityEventWriter:
+    """
+    Escritor en segundo plano para security_events.
+
+    La request solo encola un dict; un hilo worker vacía la cola en INSERTs
+    masivos cada `flush_ms` milisegundos o cada `batch_size` filas.
+
+    Política si la cola se llena:
+      - "drop":   se descarta el evento
+      - "sample": por encima del 80% de ocupación se guarda 1 de cada
+                  `sample_rate`; con la cola llena se descarta
+      - "block":  la request espera hasta `block_timeout` s y luego descarta
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 200,
+        flush_ms: int = 500,
+        overflow: str = "drop",
+        sample_rate: int = 10,
+        block_timeout: float = 0.05,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {sorted(OVERFLOW_POLICIES)}")
+
+        self.app = app
+        self.max_queue = max(int(max_queue), 1)
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = max(int(flush_ms), 1) / 1000.0
+        self.overflow = overflow
+        self.sample_rate = max(int(sample_rate), 1)
+        self.block_timeout = float(block_timeout)
+
+        self.stats = WriterStats()
+        self._stats_lock = threading.Lock()
+        self._sample_seq = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    # -----------------------------
+    # API pública
+    # -----------------------------
+    def submit(self, row: dict) -> bool:
+        """Encola un evento. Devuelve False si se descartó."""
+        self._ensure_started()
+
+        if self.overflow == "sample" and self._queue.qsize() >= int(self.max_queue * 0.8):
+            with self._stats_lock:
+                self._sample_seq += 1
+                keep = self._sample_seq % self.sample_rate == 0
+                if not keep:
+                    self.stats.sampled_out += 1
+                    self.stats.dropped += 1
+            if not keep:
+                return False
+
+        try:
+            if self.overflow == "block":
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+
+        self._count(enqueued=1)
+        return True
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Fuerza la escritura de todo lo pendiente y espera a que termine."""
+        if self._thread is None or not self._thread.is_alive():
+            self._drain_sync()
+            return
+
+        req = _FlushRequest()
+        self._queue.put(req)
+        req.done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Vacía la cola y detiene el worker (se llama también en atexit)."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(_FlushRequest())
+            thread.join(timeout)
+        self._drain_sync()
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    def _ensure_started(self) -> None:
+        # tras un fork (gunicorn) el hilo del padre no existe en el hijo
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid is not None and self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+            self._pid = pid
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="security-event-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        buffer: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            timeout = max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _FlushRequest):
+                self._write(buffer)
+                buffer = []
+                item.done.set()
+                if self._stopping.is_set():
+                    return
+            elif item is not None:
+                buffer.append(item)
+
+            if len(buffer) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(buffer)
+                buffer = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _drain_sync(self) -> None:
+        buffer: list[dict] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            else:
+                buffer.append(item)
+            if len(buffer) >= self.batch_size:
+                self._write(buffer)
+                buffer = []
+        self._write(buffer)
+
+    def _write(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        with self.app.app_context():
+            try:
+                store_security_events(
+                    rows, self.app.config.get("SECURITY_EVENTS_AGGREGATE_WINDOW", 0)
+                )
+                db.session.commit()
+                self._count(written=len(rows), flushes=1)
+            except Exception:
+                db.session.rollback()
+                self._count(errors=1, dropped=len(rows))
+                log.exception("security events: batch insert failed (%d rows)", len(rows))
+            finally:
+                db.session.remove()
+
+    def _count(self, **deltas: int) -> None:
+        with self._stats_lock:
+            for name, value in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+
+def init_security_event_writer(app: Flask) -> SecurityEventWriter | None:
+    if not app.config.get("SECURITY_EVENTS_ASYNC", True):
+        return None
+
+    writer = SecurityEventWriter(
+        app,
+        max_queue=app.config.get("SECURITY_EVENTS_QUEUE_SIZE", 10_000),
+        batch_size=app.config.get("SECURITY_EVENTS_BATCH_SIZE", 200),
+        flush_ms=app.config.get("SECURITY_EVENTS_FLUSH_MS", 500),
+        overflow=app.config.get("SECURITY_EVENTS_OVERFLOW", "drop"),
+        sample_rate=app.config.get("SECURITY_EVENTS_SAMPLE_RATE", 10),
+    )
+    app.extensions["security_event_writer"] = writer
+    atexit.register(writer.stop)
+    return writer
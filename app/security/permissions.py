@@ -19,6 +19,7 @@ P_REQUESTS_ACCEPT = "requests:accept"
 
 P_AUDIT_READ = "audit:read"
 P_SECURITY_EVENTS_READ = "security_events:read"
+P_STATS_READ = "stats:read"
 
 ENDPOINT_PERMISSIONS: dict[str, str] = {
     # admin reads
@@ -40,11 +41,12 @@ ENDPOINT_PERMISSIONS: dict[str, str] = {
 ROLE_PERMISSIONS: dict[str, set[str]] = {
     "reader": {
         # si “reader” puede ver admin en modo lectura:
-        P_USERS_READ, P_BOOKS_READ, P_REQUESTS_READ, P_AUDIT_READ, P_SECURITY_EVENTS_READ
+        P_USERS_READ, P_BOOKS_READ, P_REQUESTS_READ, P_AUDIT_READ, P_SECURITY_EVENTS_READ,
+        P_STATS_READ,
     },
     "moderator": {
         P_USERS_READ, P_BOOKS_READ, P_REQUESTS_READ,
-        P_AUDIT_READ, P_SECURITY_EVENTS_READ,
+        P_AUDIT_READ, P_SECURITY_EVENTS_READ, P_STATS_READ,
 
         P_BOOKS_UPDATE_AVAILABILITY,
         P_USERS_UPDATE_STATUS,
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from flask import Flask, g, session
+
+from app.extensions import db
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lo mínimo que necesitan RBAC y los decoradores para decidir."""
+
+    id: int
+    role: str
+    is_active: bool
+    is_blocked: bool
+
+
+def init_principal(app: Flask) -> None:
+    @app.teardown_request
+    def _drop_request_principal(exc=None):
+        # g vive en el app context, que puede sobrevivir a la request
+        g.pop("principal", None)
+
+
+def _load_from_db(user_id: int) -> Principal | None:
+    row = (
+        db.session.query(User.id, User.role, User.is_active, User.is_blocked)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return Principal(
+        id=row.id,
+        role=row.role,
+        is_active=bool(row.is_active),
+        is_blocked=bool(row.is_blocked),
+    )
+
+
+def get_principal(user_id: int | None) -> Principal | None:
+    """
+    Resuelve el Principal una sola vez por request (flask.g): un SELECT de
+    cuatro columnas por PK, sin hidratar el User. Sin cache entre requests:
+    un bloqueo o cambio de rol (ORM o Core, en cualquier worker) se aplica
+    en la siguiente request.
+    """
+    if not user_id:
+        return None
+
+    cached = g.get("principal")
+    if cached is not None and cached.id == user_id:
+        return cached
+
+    principal = _load_from_db(user_id)
+    if principal is not None:
+        g.principal = principal
+    return principal
+
+
+def current_principal() -> Principal | None:
+    return get_principal(session.get("user_id"))
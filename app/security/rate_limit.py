@@ -1,23 +1,379 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict, deque
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable
+
+from flask import Flask, Request, current_app, has_app_context
+
+try:  # backend opcional
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    window_sec: float
+    remaining: int
+    reset_after: float  # s hasta que el bucket vuelve a estar lleno
+    retry_after: float  # s hasta que se permitiría la siguiente (0 si allowed)
+
+
+def _gcra_step(tat: float | None, now: float, interval: float, window: float, cost: float):
+    """
+    GCRA: un solo número por clave (TAT = theoretical arrival time).
+    Permite ráfagas de hasta `limit` y luego 1 cada `interval` segundos.
+    Devuelve (allowed, tat_resultante).
+    """
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval * cost
+    if new_tat - window > now:
+        return False, tat
+    return True, new_tat
+
+
+class RateLimitBackend(ABC):
+    """Contrato común: acquire() aplica GCRA sobre el almacenamiento concreto."""
+
+    name = "base"
+
+    # reloj inyectable (tests): segundos, misma escala que time.time()
+    clock: Callable[[], float] = staticmethod(time.time)
+
+    def acquire(self, key: str, limit: int, window_sec: float, cost: float = 1.0) -> RateLimitResult:
+        limit = max(int(limit), 1)
+        window = float(window_sec)
+        interval = window / limit
+        now = self.clock()
+
+        allowed, tat = self._update(key, now, interval, window, float(cost))
+
+        ahead = max(tat - now, 0.0)
+        # tolerancia para que 59.8 / 0.2 no quede en 298.999…
+        remaining = max(int((window - ahead) / interval + 1e-6), 0)
+        retry_after = 0.0 if allowed else max(tat + interval * cost - window - now, 0.0)
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            window_sec=window,
+            remaining=remaining,
+            reset_after=ahead,
+            retry_after=retry_after,
+        )
+
+    @abstractmethod
+    def _update(self, key: str, now: float, interval: float, window: float, cost: float):
+        """Paso GCRA atómico sobre el almacenamiento. Devuelve (allowed, tat)."""
+
+    def sweep(self, now: float | None = None) -> int:
+        """Elimina claves inactivas (TAT ya en el pasado). Devuelve cuántas."""
+        return 0
+
+
+# -------------------------------------------------
+# Memoria del proceso (dev / un solo worker)
+# -------------------------------------------------
+class MemoryBackend(RateLimitBackend):
+    name = "memory"
+
+    def __init__(self):
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _update(self, key, now, interval, window, cost):
+        with self._lock:
+            allowed, tat = _gcra_step(self._tats.get(key), now, interval, window, cost)
+            if allowed:
+                self._tats[key] = tat
+            return allowed, tat
+
+    def sweep(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = [k for k, tat in self._tats.items() if tat <= now]
+            for k in idle:
+                del self._tats[k]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# -------------------------------------------------
+# SQLite en modo WAL: compartido por todos los workers del host
+# -------------------------------------------------
+class SQLiteBackend(RateLimitBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str, busy_timeout_ms: int = 2000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " key TEXT PRIMARY KEY,"
+                " tat REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        # una conexión por hilo y por proceso (no se heredan tras fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _update(self, key, now, interval, window, cost):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            allowed, tat = _gcra_step(row[0] if row else None, now, interval, window, cost)
+            if allowed:
+                conn.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, tat),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tat
+
+    def sweep(self, now=None):
+        now = time.time() if now is None else now
+        cur = self._conn().execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+        return cur.rowcount
+
+
+# -------------------------------------------------
+# Redis (o cualquier servidor que hable su protocolo)
+# -------------------------------------------------
+_GCRA_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then tat = now end
+local new_tat = tat + interval * cost
+if new_tat - window > now then
+  return {0, tostring(tat)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    GCRA atómico en un script Lua. Las claves llevan PX = TAT - now,
+    así que Redis las expira solo y sweep() no tiene nada que hacer.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str | None = None, *, client=None, prefix: str = "rl:"):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("RATELIMIT_BACKEND=redis requires the 'redis' package")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_GCRA_LUA)
+
+    def _update(self, key, now, interval, window, cost):
+        allowed, tat = self._script(keys=[self.prefix + key], args=[now, interval, window, cost])
+        return bool(int(allowed)), float(tat)
+
+
+# -------------------------------------------------
+# Barrido de claves inactivas en segundo plano
+# -------------------------------------------------
+class _Sweeper:
+    def __init__(self, backend: RateLimitBackend, interval: float):
+        self.backend = backend
+        self.interval = interval
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self) -> None:
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="ratelimit-sweeper", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.backend.sweep()
+            except Exception:
+                log.exception("rate limit: sweep failed (%s backend)", self.backend.name)
+
+
+def build_backend(app: Flask) -> RateLimitBackend:
+    kind = (app.config.get("RATELIMIT_BACKEND") or "memory").lower()
+    if kind == "sqlite":
+        return SQLiteBackend(app.config["RATELIMIT_STORAGE_PATH"])
+    if kind == "redis":
+        return RedisBackend(app.config.get("RATELIMIT_REDIS_URL"))
+    if kind == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown RATELIMIT_BACKEND: {kind}")
+
+
+_default_backend = MemoryBackend()
+
+
+def init_rate_limiter(app: Flask) -> RateLimitBackend:
+    backend = build_backend(app)
+    app.extensions["rate_limiter"] = backend
+    app.extensions["rate_limiter_sweeper"] = _Sweeper(
+        backend, float(app.config.get("RATELIMIT_SWEEP_INTERVAL", 60))
+    )
+    return backend
+
+
+def _current_backend() -> RateLimitBackend:
+    if has_app_context():
+        backend = current_app.extensions.get("rate_limiter")
+        if backend is not None:
+            current_app.extensions["rate_limiter_sweeper"].ensure_running()
+            return backend
+    return _default_backend
 
-# key -> deque[timestamps]
-_BUCKETS: dict[str, deque[float]] = defaultdict(deque)
 
 def hit(key: str, limit: int, window_sec: int) -> bool:
     """
     Returns True if allowed, False if rate-limited.
     """
-    now = time.time()
-    q = _BUCKETS[key]
+    return _current_backend().acquire(key, limit, window_sec).allowed
+
+
+# -------------------------------------------------
+# Límites declarativos: presupuesto por rol/IP y coste por endpoint
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Budget:
+    limit: int          # unidades de coste por ventana
+    window_sec: int = 60
+
+
+Cost = float | Callable[[Request], float]
+
+
+@dataclass(frozen=True)
+class LimitRule:
+    endpoint: str | None = None   # "auth.login"; None = todo el blueprint
+    blueprint: str | None = None
+    budget: Budget = Budget(60)   # anónimos (por IP) y roles sin override
+    role_budgets: dict[str, Budget] = field(default_factory=dict)
+    costs: dict[str, Cost] = field(default_factory=dict)  # endpoint -> coste
+
+    @property
+    def name(self) -> str:
+        return self.endpoint or self.blueprint or "*"
+
+    def matches(self, endpoint: str | None, blueprint: str | None) -> bool:
+        if self.endpoint is not None:
+            return self.endpoint == endpoint
+        return self.blueprint is None or self.blueprint == blueprint
+
+    def budget_for(self, role: str | None) -> Budget:
+        return self.role_budgets.get(role, self.budget) if role else self.budget
+
+    def cost_for(self, req: Request) -> float:
+        cost = self.costs.get(req.endpoint, 1)
+        return float(cost(req) if callable(cost) else cost)
+
+
+def find_limit_rule(endpoint: str | None, blueprint: str | None, rules) -> LimitRule | None:
+    for rule in rules:
+        if rule.matches(endpoint, blueprint):
+            return rule
+    return None
+
+
+def _int_arg(req: Request, name: str, default: int) -> int:
+    try:
+        return int(req.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def books_query_cost(req: Request) -> float:
+    """
+    Coste de un listado/búsqueda de libros: sin filtros recorre todo el
+    catálogo, y las páginas profundas o grandes cuestan más.
+    """
+    cost = 1.0
+
+    filters = ("q", "genre", "language", "available", "donor")
+    if not any((req.args.get(f) or "").strip() for f in filters):
+        cost += 2
+
+    page = _int_arg(req, "page", 1)
+    if page > 1:
+        cost += min(page // 10, 10)
+
+    per_page = _int_arg(req, "per_page", _int_arg(req, "limit", 20))
+    if per_page > 20:
+        cost += (min(per_page, 200) - 20) / 20
+
+    return cost
+
+
+def _client_key(req: Request, principal) -> str:
+    if principal is not None:
+        return f"user:{principal.id}"
+    xff = req.headers.get("X-Forwarded-For")
+    ip = (xff.split(",")[0].strip() if xff else req.remote_addr) or "unknown"
+    return f"ip:{ip}"
+
 
-    # drop old
-    cutoff = now - window_sec
-    while q and q[0] < cutoff:
-        q.popleft()
+def check_rate_limit(rule: LimitRule, req: Request, principal=None) -> RateLimitResult:
+    budget = rule.budget_for(getattr(principal, "role", None))
+    key = f"{_client_key(req, principal)}:{rule.name}"
+    return _current_backend().acquire(
+        key, budget.limit, budget.window_sec, cost=rule.cost_for(req)
+    )
 
-    if len(q) >= limit:
-        return False
 
-    q.append(now)
-    return True
+def rate_limit_headers(result: RateLimitResult) -> dict[str, str]:
+    headers = {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(int(result.reset_after + 0.999)),
+        "RateLimit-Policy": f"{result.limit};w={int(result.window_sec)}",
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(int(result.retry_after + 0.999), 1))
+    return headers
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+from datetime import datetime, timedelta, timezone
+
 from flask import Request, session, current_app
+from sqlalchemy import case, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 
 from app.extensions import db
+from app.metrics import count as count_metric
 from app.models.security_event import SecurityEvent
 
+# Eventos con la misma clave dentro de la misma ventana se pliegan en una fila
+AGGREGATE_KEY = ("event_type", "status_code", "ip", "endpoint", "method", "user_id")
+
 
 def _client_ip(req: Request) -> str | None:
     xff = req.headers.get("X-Forwarded-For")
@@ -13,6 +22,114 @@ def _client_ip(req: Request) -> str | None:
     return req.remote_addr
 
 
+def _bucket_start(ts: datetime, window_sec: int) -> datetime:
+    epoch = ts.timestamp()
+    return datetime.fromtimestamp(epoch - (epoch % window_sec), tz=timezone.utc)
+
+
+def _aggregate(rows: list[dict], window_sec: int) -> list[dict]:
+    """Pliega en memoria las filas idénticas del mismo bucket."""
+    folded: dict[tuple, dict] = {}
+    for row in rows:
+        ts = row["created_at"]
+        key = tuple(row.get(k) for k in AGGREGATE_KEY) + (_bucket_start(ts, window_sec),)
+        agg = folded.get(key)
+        if agg is None:
+            folded[key] = dict(row, count=row.get("count", 1), first_seen=ts, last_seen=ts)
+            continue
+        agg["count"] += row.get("count", 1)
+        agg["first_seen"] = min(agg["first_seen"], ts)
+        agg["last_seen"] = max(agg["last_seen"], ts)
+    return list(folded.values())
+
+
+def _agg_key(row: dict) -> str:
+    # ip/user_id pueden ser NULL y NULL no choca en un índice único: se
+    # indexa un hash no nulo de la clave completa
+    raw = "\x1f".join("" if row.get(k) is None else str(row[k]) for k in AGGREGATE_KEY)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def store_security_events(rows: list[dict], window_sec: int = 0) -> None:
+    """
+    Persiste eventos (sin commit).
+
+    window_sec <= 0: una fila por evento.
+    window_sec > 0:  una fila por (clave, bucket) con
+                     INSERT ... ON CONFLICT (agg_key, bucket_start)
+                     DO UPDATE count = count + n: dos workers que vuelcan el
+                     mismo bucket a la vez suman en la misma fila.
+
+    En motores sin ON CONFLICT se hace UPDATE y, si no tocó nada, INSERT;
+    ahí dos workers simultáneos pueden repartir un bucket en dos filas.
+    """
+    if not rows:
+        return
+
+    if window_sec <= 0:
+        db.session.execute(
+            insert(SecurityEvent),
+            [
+                dict(r, count=1, first_seen=r["created_at"], last_seen=r["created_at"])
+                for r in rows
+            ],
+        )
+        return
+
+    aggregated = []
+    for agg in _aggregate(rows, window_sec):
+        agg["bucket_start"] = _bucket_start(agg["first_seen"], window_sec)
+        agg["agg_key"] = _agg_key(agg)
+        agg["created_at"] = agg["first_seen"]
+        aggregated.append(agg)
+
+    dialect_insert = _UPSERT_DIALECTS.get(db.engine.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(SecurityEvent)
+        table = SecurityEvent.__table__
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.agg_key, table.c.bucket_start],
+                set_={
+                    "count": table.c.count + stmt.excluded["count"],
+                    "last_seen": case(
+                        (stmt.excluded.last_seen > table.c.last_seen, stmt.excluded.last_seen),
+                        else_=table.c.last_seen,
+                    ),
+                },
+            ),
+            aggregated,
+        )
+        return
+
+    pending_inserts = []
+    for agg in aggregated:
+        start = agg["bucket_start"]
+        conds = [
+            getattr(SecurityEvent, k).is_(None) if agg.get(k) is None
+            else getattr(SecurityEvent, k) == agg[k]
+            for k in AGGREGATE_KEY
+        ]
+        conds += [
+            SecurityEvent.created_at >= start,
+            SecurityEvent.created_at < start + timedelta(seconds=window_sec),
+        ]
+        res = db.session.execute(
+            update(SecurityEvent)
+            .where(*conds)
+            .values(count=SecurityEvent.count + agg["count"], last_seen=agg["last_seen"])
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount == 0:
+            pending_inserts.append(agg)
+
+    if pending_inserts:
+        db.session.execute(insert(SecurityEvent), pending_inserts)
+
+
 def record_security_event(
     *,
     event_type: str,
@@ -24,15 +141,21 @@ def record_security_event(
     """
     Best-effort: nunca debe romper la request.
     En TESTING: no guarda (para no ensuciar tests).
+
+    Si hay writer asíncrono (SECURITY_EVENTS_ASYNC) solo se encola;
+    si no, se inserta en la propia request como antes.
     """
     try:
+        count_metric("security_events_total", event_type=event_type)
+
         if current_app.config.get("TESTING"):
             return
 
         user_id = session.get("user_id") or getattr(user, "id", None)
         role = getattr(user, "role", None) if user else session.get("role")
 
-        ev = SecurityEvent(
+        row = dict(
+            created_at=datetime.now(timezone.utc),
             event_type=event_type,
             status_code=status_code,
             endpoint=req.endpoint,
@@ -44,7 +167,15 @@ def record_security_event(
             ip=_client_ip(req),
             details=details,
         )
-        db.session.add(ev)
+
+        writer = current_app.extensions.get("security_event_writer")
+        if writer is not None:
+            writer.submit(row)
+            return
+
+        store_security_events(
+            [row], current_app.config.get("SECURITY_EVENTS_AGGREGATE_WINDOW", 0)
+        )
         db.session.commit()
     except Exception:
         db.session.rollback()
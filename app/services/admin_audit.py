@@ -1,10 +1,24 @@
 from __future__ import annotations
 
 from flask import request
+from sqlalchemy import insert
+
 from app.extensions import db
 from app.models.admin_action import AdminAction
 
 
+def _request_context() -> dict:
+    xff = request.headers.get("X-Forwarded-For")
+    ip = (xff.split(",")[0].strip() if xff else request.remote_addr) or "unknown"
+    return {
+        "ip_address": ip,
+        "user_agent": request.headers.get("User-Agent"),
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "path": request.path,
+    }
+
+
 def log_admin_action(
     *,
     admin_id: int,
@@ -12,23 +26,43 @@ def log_admin_action(
     target_type: str,
     target_id: int | None = None,
     details: dict | None = None,
+    commit: bool = True,
 ) -> AdminAction:
-    xff = request.headers.get("X-Forwarded-For")
-    ip = (xff.split(",")[0].strip() if xff else request.remote_addr) or "unknown"
-    ua = request.headers.get("User-Agent")
-
     entry = AdminAction(
         admin_id=admin_id,
         action=action,
         target_type=target_type,
         target_id=target_id,
-        ip_address=ip,
-        user_agent=ua,
-        endpoint=request.endpoint,
-        method=request.method,
-        path=request.path,
         details=details,
+        **_request_context(),
     )
     db.session.add(entry)
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return entry
+
+
+def log_admin_actions(*, admin_id: int, actions: list[dict], commit: bool = True) -> int:
+    """
+    Varias acciones de una misma petición en un único INSERT multi-fila.
+    Cada dict lleva action, target_type y opcionalmente target_id/details.
+    """
+    if not actions:
+        return 0
+
+    context = _request_context()
+    rows = [
+        {
+            "admin_id": admin_id,
+            "action": a["action"],
+            "target_type": a["target_type"],
+            "target_id": a.get("target_id"),
+            "details": a.get("details"),
+            **context,
+        }
+        for a in actions
+    ]
+    db.session.execute(insert(AdminAction), rows)
+    if commit:
+        db.session.commit()
+    return len(rows)
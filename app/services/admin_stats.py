@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from flask import current_app
+from sqlalchemy import func
+
+from app.cache import TTLCache
+from app.extensions import db
+from app.models.book import Book
+from app.models.book_request import BookRequest
+from app.models.user import User
+
+
+def _stats_cache() -> TTLCache:
+    cache = current_app.extensions.get("admin_stats_cache")
+    if cache is None:
+        cache = TTLCache(maxsize=1, ttl=current_app.config.get("ADMIN_STATS_CACHE_TTL", 10))
+        current_app.extensions["admin_stats_cache"] = cache
+    return cache
+
+
+def compute_admin_stats() -> dict:
+    """Tres GROUP BY (users, books, book_requests): unas pocas filas cada uno."""
+    users = {"total": 0, "blocked": 0, "inactive": 0, "by_role": {}}
+    rows = (
+        db.session.query(User.role, User.is_active, User.is_blocked, func.count(User.id))
+        .group_by(User.role, User.is_active, User.is_blocked)
+        .all()
+    )
+    for role, is_active, is_blocked, n in rows:
+        users["total"] += n
+        users["by_role"][role] = users["by_role"].get(role, 0) + n
+        if is_blocked:
+            users["blocked"] += n
+        if not is_active:
+            users["inactive"] += n
+
+    books = {"total": 0, "available": 0}
+    for is_available, n in db.session.query(Book.is_available, func.count(Book.id)).group_by(Book.is_available):
+        books["total"] += n
+        if is_available:
+            books["available"] += n
+
+    requests = {"total": 0, "by_status": {}}
+    for status, n in db.session.query(BookRequest.status, func.count(BookRequest.id)).group_by(BookRequest.status):
+        requests["total"] += n
+        requests["by_status"][status] = n
+    requests["pending"] = requests["by_status"].get("pending", 0)
+
+    return {"users": users, "books": books, "requests": requests}
+
+
+def admin_stats() -> dict:
+    """
+    Conteos del dashboard. Se cachean ADMIN_STATS_CACHE_TTL segundos: el
+    dashboard tolera unos segundos de retraso y así recargarlo no cuesta
+    ninguna consulta.
+    """
+    cache = _stats_cache()
+    stats = cache.get("stats")
+    if stats is None:
+        stats = compute_admin_stats()
+        cache.set("stats", stats)
+    return stats
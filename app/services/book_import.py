@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import bindparam, select
+
+from app.extensions import db
+from app.models.book import Book
+from app.services.book_indexes import invalidate_book_indexes
+from app.services.generations import BOOKS, bump_generation
+from app.text import normalize_text
+
+FORMATS = ("csv", "jsonl")
+ON_DUPLICATE = ("skip", "upsert", "insert")
+
+BOOK_FIELDS = ("title", "author", "genre", "language", "description")
+REQUIRED_FIELDS = ["title", "author"]
+
+# lo que un upsert reescribe (título/autor normalizados son la clave)
+UPSERT_FIELDS = ("title", "author", "genre", "language", "description", "genre_norm", "language_norm")
+
+
+def clean_book_fields(data: dict) -> tuple[dict, list[str]]:
+    """
+    Campos de un libro tal y como los acepta POST /books/ (strip, vacíos a
+    None). Devuelve (campos, obligatorios que faltan).
+    """
+    fields = {}
+    for name in BOOK_FIELDS:
+        value = data.get(name)
+        value = str(value).strip() if value is not None else ""
+        fields[name] = value or None
+
+    missing = [name for name in REQUIRED_FIELDS if not fields[name]]
+    return fields, missing
+
+
+# -------------------------------------------------
+# Lectura incremental
+# -------------------------------------------------
+def _text_stream(stream) -> io.TextIOBase:
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def iter_records(stream, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """(nº de línea, registro, error de parseo), sin cargar el fichero entero."""
+    text = _text_stream(stream)
+    reader = csv.DictReader(text) if fmt == "csv" else None
+    try:
+        if reader is not None:
+            for record in reader:
+                yield reader.line_num, record, None
+        else:
+            yield from _iter_jsonl(text)
+    except (UnicodeDecodeError, csv.Error):
+        # no se puede seguir leyendo: se corta aquí y lo anterior se conserva
+        yield (reader.line_num if reader is not None else 0), None, "unreadable_input"
+
+
+def _iter_jsonl(text) -> Iterator[tuple[int, dict | None, str | None]]:
+    for line_no, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, None, "invalid_json"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "invalid_json"
+            continue
+        yield line_no, record, None
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "jsonl"
+    return None
+
+
+# -------------------------------------------------
+# Import por lotes
+# -------------------------------------------------
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    batches: int = 0
+    errors: list[dict] = field(default_factory=list)
+    max_errors: int = 100
+
+    def error(self, line: int, error: str, **extra) -> None:
+        self.failed += 1
+        # solo las primeras: el informe no crece con el fichero
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error, **extra})
+
+    def to_dict(self) -> dict:
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _row(fields: dict, donor_id: int) -> dict:
+    # el INSERT es Core (executemany): los listeners del ORM no calculan *_norm
+    return {
+        **fields,
+        "title_norm": normalize_text(fields["title"]),
+        "author_norm": normalize_text(fields["author"]),
+        "genre_norm": normalize_text(fields["genre"]),
+        "language_norm": normalize_text(fields["language"]),
+        "donor_id": donor_id,
+        "is_available": True,
+    }
+
+
+def _existing(donor_id: int, rows: list[dict]) -> dict[tuple[str, str], int]:
+    """(title_norm, author_norm) -> id de los libros del donante que ya existen."""
+    titles = {r["title_norm"] for r in rows}
+    found = db.session.execute(
+        select(Book.id, Book.title_norm, Book.author_norm)
+        .where(Book.donor_id == donor_id, Book.title_norm.in_(titles))
+    )
+    return {(r.title_norm, r.author_norm): r.id for r in found}
+
+
+def _flush_batch(batch: list[tuple[int, dict]], donor_id: int, on_duplicate: str, report: ImportReport) -> None:
+    books = Book.__table__
+    inserts, updates = [], []
+
+    existing = _existing(donor_id, [r for _, r in batch]) if on_duplicate != "insert" else {}
+    seen: set[tuple[str, str]] = set()
+
+    for _, row in batch:
+        key = (row["title_norm"], row["author_norm"])
+        book_id = existing.get(key)
+        if on_duplicate != "insert" and (book_id is not None or key in seen):
+            if on_duplicate == "upsert" and book_id is not None:
+                updates.append({"b_id": book_id, **{f"u_{f}": row[f] for f in UPSERT_FIELDS}})
+            else:
+                report.skipped += 1
+            continue
+        seen.add(key)
+        inserts.append(row)
+
+    if inserts:
+        db.session.execute(books.insert(), inserts)
+    if updates:
+        db.session.execute(
+            books.update()
+            .where(books.c.id == bindparam("b_id"))
+            .values(**{f: bindparam(f"u_{f}") for f in UPSERT_FIELDS}),
+            updates,
+        )
+
+    if inserts or updates:
+        bump_generation(BOOKS)
+    db.session.commit()
+
+    report.inserted += len(inserts)
+    report.updated += len(updates)
+    report.batches += 1
+
+
+def import_books(
+    records: Iterable[tuple[int, dict | None, str | None]],
+    *,
+    donor_id: int,
+    batch_size: int = 1000,
+    on_duplicate: str = "skip",
+    max_errors: int = 100,
+    progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Valida como POST /books/ e inserta por lotes de `batch_size` con un
+    executemany y un commit por lote; en memoria solo hay un lote.
+
+    Duplicado = mismo (título, autor) normalizado del mismo donante:
+    skip (por defecto) lo ignora, upsert actualiza el existente e insert
+    lo da de alta igualmente.
+    """
+    report = ImportReport(max_errors=max_errors)
+    batch: list[tuple[int, dict]] = []
+
+    for line, record, parse_error in records:
+        report.read += 1
+        if parse_error:
+            report.error(line, parse_error)
+            continue
+
+        fields, missing = clean_book_fields(record)
+        if missing:
+            report.error(line, "missing_fields", missing=missing)
+            continue
+
+        batch.append((line, _row(fields, donor_id)))
+        if len(batch) >= batch_size:
+            _flush_batch(batch, donor_id, on_duplicate, report)
+            batch = []
+            if progress:
+                progress(report)
+
+    if batch:
+        _flush_batch(batch, donor_id, on_duplicate, report)
+        if progress:
+            progress(report)
+
+    if report.inserted or report.updated:
+        # los índices en memoria no ven los INSERT Core: se reconstruyen al usarse
+        invalidate_book_indexes()
+
+    return report
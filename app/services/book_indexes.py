@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Collection, NamedTuple
+
+from flask import Flask, current_app, has_app_context
+from rapidfuzz import fuzz, process
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.extensions import db
+from app.models.book import Book
+from app.text import normalize_text
+
+log = logging.getLogger(__name__)
+
+
+class BookDoc(NamedTuple):
+    title: str
+    author: str
+    title_norm: str
+    author_norm: str
+
+
+class BookMemoryIndex(ABC):
+    """
+    Base de los índices en memoria sobre (id, title, author) de books.
+
+    - Se construye perezosamente con una sola pasada por la tabla.
+    - Este proceso lo mantiene al día tras cada commit (listeners abajo).
+    - Cada `refresh_interval` s recoge lo que hayan escrito otros workers
+      o cargas bulk mirando updated_at (no en cada request); los borrados
+      no dejan rastro en updated_at y se detectan comparando el COUNT.
+    - warm_up() lo construye en segundo plano para que no lo pague la
+      primera búsqueda.
+    """
+
+    # margen para commits lentos cuyo updated_at quedó por detrás
+    SYNC_OVERLAP = timedelta(seconds=5)
+    # delta mayor que esto (import masivo): una reconstrucción ordenada
+    # en vez de miles de inserciones sueltas bajo el lock
+    REBUILD_THRESHOLD = 2000
+
+    def __init__(self, refresh_interval: float = 60.0):
+        self.refresh_interval = float(refresh_interval)
+        self._lock = threading.RLock()
+        self._built = False
+        self._synced_until: datetime | None = None
+        self._checked_at = 0.0
+        self._warm_pid: int | None = None
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def ensure_ready(self) -> None:
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._build()
+            return
+
+        if self.refresh_interval > 0 and time.monotonic() - self._checked_at > self.refresh_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at > self.refresh_interval:
+                    self._sync_delta()
+
+    def warm_up(self, app: Flask) -> None:
+        """Construye el índice en un hilo aparte (uno por proceso: tras un fork se repite)."""
+        pid = os.getpid()
+        if self._built or self._warm_pid == pid:
+            return
+        self._warm_pid = pid
+
+        def run():
+            with app.app_context():
+                try:
+                    self.ensure_ready()
+                except Exception:
+                    # se queda perezoso: lo construirá la primera búsqueda
+                    log.exception("book index warm-up failed")
+
+        threading.Thread(target=run, name=f"{type(self).__name__}-warm-up", daemon=True).start()
+
+    def invalidate(self) -> None:
+        """Fuerza reconstrucción completa en el próximo uso."""
+        with self._lock:
+            self._built = False
+
+    def upsert(self, book_id: int, title: str | None, author: str | None) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(book_id)
+            self._add(book_id, BookDoc(
+                title or "", author or "", normalize_text(title) or "", normalize_text(author) or "",
+            ))
+
+    def remove(self, book_id: int) -> None:
+        with self._lock:
+            if self._built:
+                self._remove(book_id)
+
+    # -----------------------------
+    # Carga desde la BD
+    # -----------------------------
+    def _rows(self, since: datetime | None = None):
+        query = db.session.query(
+            Book.id, Book.title, Book.author, Book.title_norm, Book.author_norm, Book.updated_at
+        )
+        if since is not None:
+            query = query.filter(Book.updated_at >= since - self.SYNC_OVERLAP)
+        return query
+
+    def _build(self) -> None:
+        # también al reconstruir desde _sync_delta: _add carga sin ordenar
+        self._built = False
+        self._clear()
+        latest = None
+        for row in self._rows().yield_per(5000):
+            self._add(row.id, _doc(row))
+            latest = row.updated_at if latest is None or row.updated_at > latest else latest
+        self._finish_build()
+        self._synced_until = latest
+        self._checked_at = time.monotonic()
+        self._built = True
+
+    def _sync_delta(self) -> None:
+        delta = self._rows(since=self._synced_until).limit(self.REBUILD_THRESHOLD + 1).all()
+        if len(delta) > self.REBUILD_THRESHOLD:
+            self._build()
+            return
+
+        latest = self._synced_until
+        for row in delta:
+            self._remove(row.id)
+            self._add(row.id, _doc(row))
+            latest = row.updated_at if latest is None or row.updated_at > latest else latest
+        self._drop_deleted()
+        self._synced_until = latest
+        self._checked_at = time.monotonic()
+
+    def _drop_deleted(self) -> None:
+        # con el delta aplicado, índice y tabla solo difieren en nº de filas
+        # si otro proceso borró libros: entonces (y solo entonces) se cruzan los ids
+        indexed = self._indexed_ids()
+        if db.session.query(func.count(Book.id)).scalar() == len(indexed):
+            return
+        alive = {book_id for (book_id,) in db.session.query(Book.id).yield_per(5000)}
+        for book_id in [i for i in indexed if i not in alive]:
+            self._remove(book_id)
+
+    # -----------------------------
+    # A implementar por cada índice
+    # -----------------------------
+    @abstractmethod
+    def _clear(self) -> None:
+        """Vacía el índice antes de una carga completa."""
+
+    @abstractmethod
+    def _add(self, book_id: int, doc: BookDoc) -> None:
+        """Indexa un libro (el llamador ya tiene el lock)."""
+
+    @abstractmethod
+    def _remove(self, book_id: int) -> None:
+        """Quita un libro si está indexado (el llamador ya tiene el lock)."""
+
+    @abstractmethod
+    def _indexed_ids(self) -> Collection[int]:
+        """Ids indexados ahora mismo (el llamador ya tiene el lock)."""
+
+    def _finish_build(self) -> None:
+        """Gancho tras la carga completa (p.ej. ordenar una sola vez)."""
+
+
+def _doc(row) -> BookDoc:
+    return BookDoc(row.title or "", row.author or "", row.title_norm or "", row.author_norm or "")
+
+
+# -------------------------------------------------
+# Búsqueda tolerante a errores: trigramas + rapidfuzz
+# -------------------------------------------------
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex(BookMemoryIndex):
+    """
+    Índice invertido trigram -> ids. Los candidatos son los libros que más
+    trigramas comparten con la consulta; solo esos se puntúan con rapidfuzz.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0, candidates: int = 200):
+        super().__init__(refresh_interval)
+        self.candidates = candidates
+        self._docs: dict[int, tuple[str, str]] = {}
+        self._postings: dict[str, set[int]] = {}
+
+    def _clear(self) -> None:
+        self._docs = {}
+        self._postings = {}
+
+    def _add(self, book_id, doc) -> None:
+        self._docs[book_id] = (doc.title_norm, doc.author_norm)
+        for gram in trigrams(doc.title_norm) | trigrams(doc.author_norm):
+            self._postings.setdefault(gram, set()).add(book_id)
+
+    def _remove(self, book_id) -> None:
+        doc = self._docs.pop(book_id, None)
+        if doc is None:
+            return
+        for gram in trigrams(doc[0]) | trigrams(doc[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(book_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _indexed_ids(self):
+        return self._docs.keys()
+
+    def search(
+        self,
+        q: str,
+        limit: int = 50,
+        min_score: float = 60.0,
+        candidates: int | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        [(book_id, score)] de mayor a menor score (0-100). Se puntúan los
+        `candidates` libros (por defecto self.candidates) que más trigramas
+        comparten con la consulta.
+        """
+        self.ensure_ready()
+        query = normalize_text(q) or ""
+        if not query:
+            return []
+
+        with self._lock:
+            hits: Counter[int] = Counter()
+            for gram in trigrams(query):
+                ids = self._postings.get(gram, ())
+                hits.update(ids)
+            choices = {}
+            for book_id, _ in hits.most_common(candidates or self.candidates):
+                title_norm, author_norm = self._docs[book_id]
+                choices[(book_id, "title")] = title_norm
+                choices[(book_id, "author")] = author_norm
+
+        if not choices:
+            return []
+
+        # puntuación en lote (extract no necesita numpy, a diferencia de cdist);
+        # de title/author nos quedamos con el mejor
+        best: dict[int, float] = {}
+        for _, score, (book_id, _field) in process.extract(
+            query, choices, scorer=fuzz.WRatio, limit=None, score_cutoff=min_score
+        ):
+            if score > best.get(book_id, -1.0):
+                best[book_id] = float(score)
+
+        scored = list(best.items())
+        scored.sort(key=lambda item: (-item[1], -item[0]))
+        return scored[:limit]
+
+
+# -------------------------------------------------
+# Autocompletado: array ordenado + bisect
+# -------------------------------------------------
+def word_starts(text: str) -> set[str]:
+    """"el quijote" -> {"el quijote", "quijote"}: se sugiere por cualquier palabra."""
+    words = text.split(" ")
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class PrefixIndex(BookMemoryIndex):
+    """
+    Array ordenado de (texto desde cada inicio de palabra, tipo, texto
+    normalizado); un prefijo es un rango contiguo que se localiza con bisect.
+    La popularidad es el nº de libros que comparten el título/autor.
+    """
+
+    KINDS = ("title", "author")
+
+    def __init__(self, refresh_interval: float = 60.0, memo_size: int = 4096):
+        super().__init__(refresh_interval)
+        self._keys: list[tuple[str, str, str]] = []
+        self._entries: dict[tuple[str, str], list] = {}  # (tipo, norm) -> [nº libros, texto]
+        self._docs: dict[int, BookDoc] = {}
+        # los prefijos cortos abarcan rangos largos: se memoriza el top-k
+        # hasta el siguiente cambio del índice
+        self._memo = TTLCache(maxsize=memo_size, ttl=3600)
+
+    def _clear(self) -> None:
+        self._keys = []
+        self._entries = {}
+        self._docs = {}
+        self._memo.clear()
+
+    def _finish_build(self) -> None:
+        self._keys.sort()
+
+    @staticmethod
+    def _fields(doc: BookDoc):
+        return (("title", doc.title_norm, doc.title), ("author", doc.author_norm, doc.author))
+
+    def _add(self, book_id, doc) -> None:
+        self._docs[book_id] = doc
+        for kind, norm, text in self._fields(doc):
+            if not norm:
+                continue
+            entry = self._entries.get((kind, norm))
+            if entry is not None:
+                entry[0] += 1
+                continue
+            self._entries[(kind, norm)] = [1, text]
+            for start in word_starts(norm):
+                # en la carga completa se ordena una vez al final
+                if self._built:
+                    insort(self._keys, (start, kind, norm))
+                else:
+                    self._keys.append((start, kind, norm))
+        self._memo.clear()
+
+    def _remove(self, book_id) -> None:
+        doc = self._docs.pop(book_id, None)
+        if doc is None:
+            return
+        for kind, norm, _ in self._fields(doc):
+            entry = self._entries.get((kind, norm))
+            if entry is None:
+                continue
+            entry[0] -= 1
+            if entry[0] > 0:
+                continue
+            del self._entries[(kind, norm)]
+            for start in word_starts(norm):
+                key = (start, kind, norm)
+                i = bisect_left(self._keys, key)
+                if i < len(self._keys) and self._keys[i] == key:
+                    del self._keys[i]
+        self._memo.clear()
+
+    def _indexed_ids(self):
+        return self._docs.keys()
+
+    def suggest(self, prefix: str, limit: int = 10, kind: str | None = None) -> list[dict]:
+        """Top-`limit` títulos/autores que empiezan (por palabra) por `prefix`."""
+        self.ensure_ready()
+        p = normalize_text(prefix) or ""
+        if not p:
+            return []
+
+        memo_key = (p, kind, limit)
+        cached = self._memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            lo = bisect_left(self._keys, (p,))
+            hi = bisect_left(self._keys, (p + "\U0010ffff",), lo)
+            matches = {}
+            for i in range(lo, hi):
+                _, k, norm = self._keys[i]
+                if kind is None or k == kind:
+                    matches[(k, norm)] = self._entries[(k, norm)]
+
+            # más libros primero; a igualdad, el texto más corto
+            top = heapq.nlargest(limit, matches.items(), key=lambda kv: (kv[1][0], -len(kv[0][1])))
+            result = [{"text": text, "type": k, "books": n} for (k, _), (n, text) in top]
+            self._memo.set(memo_key, result)
+        return result
+
+
+# -------------------------------------------------
+# Registro por app + sincronización tras commit
+# -------------------------------------------------
+def init_book_indexes(app: Flask) -> None:
+    refresh = app.config.get("BOOK_INDEX_REFRESH_SEC", 60)
+    app.extensions["book_fuzzy_index"] = TrigramIndex(refresh_interval=refresh)
+    app.extensions["book_prefix_index"] = PrefixIndex(refresh_interval=refresh)
+    app.extensions["book_indexes"] = [
+        app.extensions["book_fuzzy_index"],
+        app.extensions["book_prefix_index"],
+    ]
+
+    if app.config.get("BOOK_INDEX_WARMUP", True):
+        # en cada worker, al llegar su primera request (el hilo no sobrevive al fork)
+        @app.before_request
+        def _warm_book_indexes():
+            for index in app.extensions["book_indexes"]:
+                index.warm_up(app)
+
+
+def fuzzy_index() -> TrigramIndex:
+    return current_app.extensions["book_fuzzy_index"]
+
+
+def prefix_index() -> PrefixIndex:
+    return current_app.extensions["book_prefix_index"]
+
+
+def invalidate_book_indexes() -> None:
+    """Tras escrituras masivas fuera del ORM: reconstrucción perezosa."""
+    for index in current_app.extensions.get("book_indexes", ()):
+        index.invalidate()
+
+
+_INFO_KEY = "book_index_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_book_changes(session: Session, flush_context) -> None:
+    changes = session.info.setdefault(_INFO_KEY, {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Book) and obj.id is not None:
+            changes[obj.id] = (obj.title, obj.author)
+    for obj in session.deleted:
+        if isinstance(obj, Book) and obj.id is not None:
+            changes[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_book_changes(session: Session) -> None:
+    changes = session.info.pop(_INFO_KEY, None)
+    if not changes or not has_app_context():
+        return
+    for index in current_app.extensions.get("book_indexes", ()):
+        for book_id, values in changes.items():
+            if values is None:
+                index.remove(book_id)
+            else:
+                index.upsert(book_id, *values)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_book_changes(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import re
+
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy import event, func, literal_column, text
+
+from app.cache import SingleFlight, TTLCache
+from app.extensions import db
+from app.models.book import Book
+from app.services.generations import BOOKS, current_generation
+from app.text import normalize_text
+
+FTS_TABLE = "books_fts"
+
+# Índice FTS5 "external content": guarda solo el índice invertido, el texto
+# sigue en books. Los triggers lo mantienen sincronizado con cualquier
+# escritura (ORM, bulk o SQL a mano).
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author, description,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, description ON books BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+]
+
+FTS_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS books_fts_ai",
+    "DROP TRIGGER IF EXISTS books_fts_ad",
+    "DROP TRIGGER IF EXISTS books_fts_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# pesos bm25 por columna: title, author, description
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def sqlite_supports_fts5(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        rows = connection.exec_driver_sql("PRAGMA compile_options").fetchall()
+    except Exception:
+        return False
+    return any(r[0] == "ENABLE_FTS5" for r in rows)
+
+
+def install_fts(connection) -> bool:
+    """Crea tabla FTS + triggers si la BD lo soporta. Devuelve si quedó instalado."""
+    if not sqlite_supports_fts5(connection):
+        return False
+    for ddl in FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    return True
+
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_fts_with_books(target, connection, **kw):
+    # db.create_all() (tests, instalaciones nuevas) no conoce la tabla virtual
+    if install_fts(connection):
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+@event.listens_for(Book.__table__, "before_drop")
+def _drop_fts_with_books(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        for ddl in FTS_DROP_DDL:
+            connection.exec_driver_sql(ddl)
+
+
+def fts_enabled() -> bool:
+    """¿Existe el índice FTS en esta BD? Se comprueba una vez por proceso."""
+    state = current_app.extensions.get("books_fts")
+    if state is None:
+        state = False
+        if db.engine.dialect.name == "sqlite":
+            state = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"),
+                {"n": FTS_TABLE},
+            ).first() is not None
+        current_app.extensions["books_fts"] = state
+    return state
+
+
+def rebuild_fts() -> bool:
+    """(Re)crea el índice FTS desde books. Devuelve False si no hay soporte."""
+    with db.engine.begin() as conn:
+        if not install_fts(conn):
+            return False
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    current_app.extensions["books_fts"] = True
+    return True
+
+
+def fts_match_expression(q: str) -> str | None:
+    """
+    Texto libre -> consulta FTS5 segura: cada palabra entre comillas y como
+    prefijo ("quij"*), todas obligatorias. None si no queda ninguna palabra.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def apply_text_search(query, q: str, *, by_relevance: bool = False):
+    """
+    Filtra `query` (sobre Book) por texto. Con FTS5 usa el índice y, si se
+    pide, ordena por bm25; sin FTS cae a LIKE sobre las columnas *_norm
+    (sin lower() por fila, insensible a acentos).
+    Devuelve (query, ordered) indicando si ya se aplicó un orden.
+    """
+    match = fts_match_expression(q) if fts_enabled() else None
+
+    if match is None:
+        like = f"%{normalize_text(q)}%"
+        return query.filter(sa.or_(Book.title_norm.like(like), Book.author_norm.like(like))), False
+
+    fts = sa.table(FTS_TABLE, sa.column("rowid"))
+    query = query.join(fts, fts.c.rowid == Book.id).filter(
+        literal_column(FTS_TABLE).op("MATCH")(match)
+    )
+    if by_relevance:
+        rank = func.bm25(literal_column(FTS_TABLE), *BM25_WEIGHTS)
+        return query.order_by(rank, Book.id.desc()), True
+    return query, False
+
+
+# -------------------------------------------------
+# Conteo de resultados: exact | estimate | none
+# -------------------------------------------------
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def _count_cache() -> TTLCache:
+    cache = current_app.extensions.get("books_count_cache")
+    if cache is None:
+        cache = TTLCache(
+            maxsize=current_app.config.get("BOOKS_COUNT_CACHE_SIZE", 2048),
+            ttl=current_app.config.get("BOOKS_COUNT_CACHE_TTL", 300),
+        )
+        current_app.extensions["books_count_cache"] = cache
+    return cache
+
+
+def _estimate_books_rows() -> int:
+    """Estimación barata del tamaño de books sin recorrerla."""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        value = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'books'")
+        ).scalar()
+        if value is not None and value >= 0:
+            return int(value)
+    # ids autoincrementales y sin borrado físico: max(id) ~ count(*)
+    return int(db.session.query(func.max(Book.id)).scalar() or 0)
+
+
+def count_search_results(query, key: tuple, mode: str, *, filtered: bool):
+    """
+    Devuelve (total, is_estimate).
+
+    exact:    count(*) cacheado por combinación de filtros y generación de books
+              (cualquier escritura en books invalida)
+    estimate: el último conteo conocido para esos filtros aunque sea de una
+              generación anterior; sin filtros, estadística de la tabla
+    none:     (None, False): el llamador usa has_more
+    """
+    if mode == "none":
+        return None, False
+
+    cache = _count_cache()
+    generation = current_generation(BOOKS)
+    cached = cache.get(key)
+
+    if cached is not None:
+        cached_generation, cached_total = cached
+        if cached_generation == generation:
+            return cached_total, False
+        if mode == "estimate":
+            return cached_total, True
+
+    if mode == "estimate" and not filtered:
+        return _estimate_books_rows(), True
+
+    total = query.order_by(None).count()
+    cache.set(key, (generation, total))
+    return total, False
+
+
+# -------------------------------------------------
+# Resultados de /books/search cacheados
+# -------------------------------------------------
+def _result_cache() -> tuple[TTLCache, SingleFlight]:
+    ext = current_app.extensions.get("books_search_cache")
+    if ext is None:
+        ext = (
+            TTLCache(
+                maxsize=current_app.config.get("BOOKS_SEARCH_CACHE_SIZE", 512),
+                ttl=current_app.config.get("BOOKS_SEARCH_CACHE_TTL", 60),
+            ),
+            SingleFlight(),
+        )
+        current_app.extensions["books_search_cache"] = ext
+    return ext
+
+
+def cached_search(key: tuple, compute, *, generation: int | None = None):
+    """
+    Payload de una búsqueda cacheado por (generación de books, clave
+    normalizada). Una escritura en books cambia la generación: las entradas
+    viejas dejan de acertar y salen por LRU/TTL. Los fallos concurrentes de
+    la misma clave se agrupan: una sola ejecución contra la BD.
+
+    Devuelve (payload, hit) con hit=True si no hubo que consultar.
+    """
+    if not current_app.config.get("BOOKS_SEARCH_CACHE_ENABLED", True):
+        return compute(), False
+
+    cache, flights = _result_cache()
+    if generation is None:
+        generation = current_generation(BOOKS)
+    full_key = (generation, *key)
+
+    payload = cache.get(full_key)
+    if payload is not None:
+        return payload, True
+
+    def load():
+        value = compute()
+        cache.set(full_key, value)
+        return value
+
+    payload, shared = flights.do(full_key, load)
+    return payload, shared
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from itertools import chain
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.book import Book
+from app.models.table_generation import TableGeneration
+
+BOOKS = "books"
+
+# modelo ORM -> contador que invalida
+TRACKED_MODELS = {Book: BOOKS}
+
+
+def current_generation(name: str) -> int:
+    value = db.session.execute(
+        select(TableGeneration.generation).where(TableGeneration.name == name)
+    ).scalar()
+    return int(value or 0)
+
+
+def bump_generation(name: str, connection=None) -> None:
+    """
+    Incrementa el contador dentro de la transacción en curso. Las escrituras
+    Core/bulk sobre tablas vigiladas (que no pasan por el flush del ORM)
+    deben llamarlo a mano.
+    """
+    conn = connection if connection is not None else db.session.connection()
+    res = conn.execute(
+        update(TableGeneration)
+        .where(TableGeneration.name == name)
+        .values(generation=TableGeneration.generation + 1)
+    )
+    if res.rowcount == 0:
+        conn.execute(insert(TableGeneration).values(name=name, generation=1))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context) -> None:
+    names = set()
+    for obj in chain(session.new, session.deleted, session.dirty):
+        name = TRACKED_MODELS.get(type(obj))
+        if name is None or name in names:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        names.add(name)
+
+    for name in sorted(names):
+        bump_generation(name, connection=session.connection())
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Collection
+
+from sqlalchemy import and_, bindparam, case, func, select, update
+
+from app.extensions import db
+from app.models.book import Book
+from app.models.book_request import BookRequest, PENDING, ACCEPTED, STATUS_CODES
+from app.services.generations import BOOKS, bump_generation
+
+# estado -> columna contador en books
+COUNTERS = {PENDING: "pending_count", ACCEPTED: "accepted_count"}
+
+
+@dataclass(frozen=True)
+class TransitionResult:
+    ok: bool
+    request_id: int
+    status: str | None = None        # estado final (ok) o actual (invalid_state)
+    old_status: str | None = None
+    book_id: int | None = None
+    error: str | None = None         # not_found | forbidden | invalid_state | book_not_available
+
+
+def other_statuses(to_status: str) -> tuple[str, ...]:
+    """Orígenes posibles para un cambio libre (admin); pending primero, el caso habitual."""
+    return tuple(s for s in STATUS_CODES if s != to_status)
+
+
+def transition_request(
+    request_id: int,
+    to_status: str,
+    *,
+    from_status: str | Collection[str] = PENDING,
+    requester_id: int | None = None,
+    donor_id: int | None = None,
+) -> TransitionResult:
+    """
+    Cambia el estado con un UPDATE condicional (id + estado de origen +
+    dueño) en vez de leer, comprobar en Python y escribir: dos transiciones
+    concurrentes sobre la misma solicitud no pueden ganar ambas.
+
+    Con varios `from_status` se prueba un UPDATE condicional por origen, en
+    orden, hasta que uno aplica (RETURNING solo ve el valor nuevo, así que
+    un único status IN (...) no diría de dónde venía); old_status del
+    resultado es el origen que aplicó. Sin lectura previa del estado.
+
+    El libro se actualiza con un segundo UPDATE que mueve sus contadores
+    (pending_count/accepted_count) y deriva is_available de accepted_count:
+
+    - -> accepted: solo si accepted_count = 0 y está disponible; si otro
+      accept se lo llevó antes, se deshace todo (book_not_available).
+    - accepted -> otro: vuelve a estar disponible al quedar en 0.
+
+    No hace commit ni rollback: la transacción es de quien llama. Si falla
+    (ok=False) una sola SELECT explica el motivo; tras book_not_available
+    el UPDATE de la solicitud ya está aplicado, así que quien llama debe
+    deshacer la transacción (o al menos no hacer commit).
+    """
+    conditions = [BookRequest.id == request_id]
+    if requester_id is not None:
+        conditions.append(BookRequest.requester_id == requester_id)
+    if donor_id is not None:
+        conditions.append(
+            BookRequest.book_id.in_(select(Book.id).where(Book.donor_id == donor_id).scalar_subquery())
+        )
+
+    origins = (from_status,) if isinstance(from_status, str) else tuple(from_status)
+    book_id = None
+    for from_status in origins:
+        book_id = db.session.execute(
+            update(BookRequest)
+            .where(*conditions, BookRequest.status == from_status)
+            .values(status=to_status)
+            .returning(BookRequest.book_id)
+            .execution_options(synchronize_session="fetch")
+        ).scalar()
+        if book_id is not None:
+            break
+
+    if book_id is None:
+        return _explain_failure(request_id, requester_id, donor_id)
+
+    values = {}
+    for status, delta in ((from_status, -1), (to_status, +1)):
+        column = COUNTERS.get(status)
+        if column is not None:
+            values[column] = getattr(Book, column) + delta
+
+    book_conditions = [Book.id == book_id]
+    if to_status == ACCEPTED:
+        book_conditions += [Book.accepted_count == 0, Book.is_available.is_(True)]
+        values["is_available"] = False
+    elif from_status == ACCEPTED:
+        # las expresiones de SET ven el valor previo de accepted_count
+        values["is_available"] = case((Book.accepted_count <= 1, True), else_=False)
+
+    if values:
+        changed = db.session.execute(
+            update(Book)
+            .where(*book_conditions)
+            .values(**values)
+            .execution_options(synchronize_session="fetch")
+        ).rowcount
+        if not changed:
+            return TransitionResult(False, request_id, book_id=book_id, error="book_not_available")
+        bump_generation(BOOKS)
+
+    return TransitionResult(True, request_id, status=to_status, old_status=from_status, book_id=book_id)
+
+
+def _explain_failure(request_id, requester_id, donor_id) -> TransitionResult:
+    row = db.session.execute(
+        select(BookRequest.status, BookRequest.requester_id, BookRequest.book_id, Book.donor_id)
+        .join(Book, Book.id == BookRequest.book_id)
+        .where(BookRequest.id == request_id)
+    ).first()
+
+    if row is None:
+        return TransitionResult(False, request_id, error="not_found")
+
+    if requester_id is not None and row.requester_id != requester_id:
+        return TransitionResult(False, request_id, book_id=row.book_id, error="forbidden")
+    if donor_id is not None and row.donor_id != donor_id:
+        return TransitionResult(False, request_id, book_id=row.book_id, error="forbidden")
+
+    return TransitionResult(False, request_id, status=row.status, book_id=row.book_id, error="invalid_state")
+
+
+# -------------------------------------------------
+# Transiciones en lote (moderación admin)
+# -------------------------------------------------
+@dataclass(frozen=True)
+class BulkTransitionItem:
+    id: int
+    status: str
+
+
+def bulk_transition_requests(items: list[BulkTransitionItem]) -> list[TransitionResult]:
+    """
+    Aplica muchas transiciones en la transacción en curso con UPDATEs por
+    conjuntos; no hace commit. Resultado por elemento, en el orden recibido.
+
+    1. Una SELECT lee estado actual y libro de todas las solicitudes.
+    2. Un UPDATE reclama los libros de los accepts (solo los libres; como
+       mucho un accept por libro en el lote).
+    3. Un UPDATE ... RETURNING por cada par (origen, destino), condicionado
+       al estado leído: lo que cambió entre medias se informa como conflicto.
+    4. Contadores y disponibilidad: un UPDATE por libro afectado (executemany)
+       y uno final que libera los libros sin solicitudes aceptadas.
+    """
+    results: dict[int, TransitionResult] = {}
+    ids = [item.id for item in items]
+
+    current = {
+        row.id: row
+        for row in db.session.execute(
+            select(BookRequest.id, BookRequest.status, BookRequest.book_id, Book.accepted_count, Book.is_available)
+            .join(Book, Book.id == BookRequest.book_id)
+            .where(BookRequest.id.in_(ids))
+        )
+    }
+
+    groups: dict[tuple[str, str], list[int]] = {}
+    accepts_by_book: dict[int, int] = {}
+    seen: set[int] = set()
+    for item in items:
+        if item.id in seen:  # repetidos: cuenta la primera aparición
+            continue
+        seen.add(item.id)
+        row = current.get(item.id)
+        if row is None:
+            results[item.id] = TransitionResult(False, item.id, error="not_found")
+            continue
+        if row.status == item.status:
+            results[item.id] = TransitionResult(
+                True, item.id, status=row.status, old_status=row.status, book_id=row.book_id
+            )
+            continue
+        if item.status == ACCEPTED:
+            if row.book_id in accepts_by_book or row.accepted_count or not row.is_available:
+                results[item.id] = TransitionResult(False, item.id, book_id=row.book_id, error="book_not_available")
+                continue
+            accepts_by_book[row.book_id] = item.id
+        groups.setdefault((row.status, item.status), []).append(item.id)
+
+    # 2. reclamar libros para los accepts
+    claimed: set[int] = set()
+    if accepts_by_book:
+        claimed = set(db.session.execute(
+            update(Book)
+            .where(Book.id.in_(accepts_by_book), Book.accepted_count == 0, Book.is_available.is_(True))
+            .values(is_available=False)
+            .returning(Book.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        for book_id, request_id in accepts_by_book.items():
+            if book_id not in claimed:
+                results[request_id] = TransitionResult(False, request_id, book_id=book_id, error="book_not_available")
+                groups[(current[request_id].status, ACCEPTED)].remove(request_id)
+
+    # 3. estados, por pares (origen, destino)
+    deltas: dict[int, dict[str, int]] = {}
+    for (from_status, to_status), group_ids in groups.items():
+        if not group_ids:
+            continue
+        applied = dict(db.session.execute(
+            update(BookRequest)
+            .where(BookRequest.id.in_(group_ids), BookRequest.status == from_status)
+            .values(status=to_status)
+            .returning(BookRequest.id, BookRequest.book_id)
+            .execution_options(synchronize_session=False)
+        ).all())
+        for request_id in group_ids:
+            book_id = applied.get(request_id)
+            if book_id is None:
+                results[request_id] = TransitionResult(
+                    False, request_id, book_id=current[request_id].book_id, error="invalid_state"
+                )
+                continue
+            results[request_id] = TransitionResult(
+                True, request_id, status=to_status, old_status=from_status, book_id=book_id
+            )
+            book_deltas = deltas.setdefault(book_id, {column: 0 for column in COUNTERS.values()})
+            for status, delta in ((from_status, -1), (to_status, +1)):
+                column = COUNTERS.get(status)
+                if column is not None:
+                    book_deltas[column] += delta
+
+    # un accept cuyo libro se reclamó pero cuya solicitud cambió entre medias
+    unclaimed = [b for b, r in accepts_by_book.items() if b in claimed and not results[r].ok]
+
+    # 4. contadores + disponibilidad
+    if deltas:
+        books = Book.__table__  # Core: executemany con bindparams, no bulk ORM por PK
+        db.session.execute(
+            books.update()
+            .where(books.c.id == bindparam("b_id"))
+            .values(
+                pending_count=books.c.pending_count + bindparam("d_pending"),
+                accepted_count=books.c.accepted_count + bindparam("d_accepted"),
+            ),
+            [
+                {"b_id": book_id, "d_pending": d["pending_count"], "d_accepted": d["accepted_count"]}
+                for book_id, d in deltas.items()
+            ],
+        )
+
+    released = [b for b, d in deltas.items() if d["accepted_count"] < 0] + unclaimed
+    if released:
+        db.session.execute(
+            update(Book)
+            .where(Book.id.in_(released), Book.accepted_count == 0)
+            .values(is_available=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    if deltas or claimed:
+        bump_generation(BOOKS)
+        db.session.expire_all()
+
+    return [results[item.id] for item in items]
+
+
+def rebuild_request_counters() -> int:
+    """
+    Recalcula pending_count/accepted_count desde book_requests (un UPDATE
+    con subconsultas correlacionadas) y marca no disponibles los libros con
+    alguna solicitud aceptada. Devuelve cuántos libros cambiaron.
+    """
+    def count(status):
+        return (
+            select(func.count(BookRequest.id))
+            .where(and_(BookRequest.book_id == Book.id, BookRequest.status == status))
+            .scalar_subquery()
+        )
+
+    pending, accepted = count(PENDING), count(ACCEPTED)
+    changed = db.session.execute(
+        update(Book)
+        .where((Book.pending_count != pending) | (Book.accepted_count != accepted))
+        .values(pending_count=pending, accepted_count=accepted)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    changed += db.session.execute(
+        update(Book)
+        .where(Book.accepted_count > 0, Book.is_available.is_(True))
+        .values(is_available=False)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if changed:
+        bump_generation(BOOKS)
+    return changed
@@ -211,27 +211,21 @@ async function loadDashboard() {
   wrap.innerHTML = "Cargando…";
 
   try {
-    // Llamadas en paralelo
-    const [users, books, reqs, audit, sec] = await Promise.all([
-      api("/api/admin/users", { method: "GET" }),
-      api("/admin/books", { method: "GET" }),
-      api("/api/admin/book-requests", { method: "GET" }),
+    // Llamadas en paralelo (los conteos vienen ya agregados del servidor)
+    const [stats, audit, sec] = await Promise.all([
+      api("/api/admin/stats", { method: "GET" }),
       api("/admin/audit?per_page=1", { method: "GET" }),
       api("/admin/security-events?limit=1", { method: "GET" }),
     ]);
 
-    const usersArr = Array.isArray(users) ? users : (users.items || []);
-    const booksArr = Array.isArray(books) ? books : (books.items || books || []);
-    const reqArr = Array.isArray(reqs) ? reqs : (reqs.items || []);
+    const totalUsers = stats.users.total;
+    const blockedUsers = stats.users.blocked;
 
-    const totalUsers = usersArr.length;
-    const blockedUsers = usersArr.filter(u => !!u.is_blocked).length;
+    const totalBooks = stats.books.total;
+    const availableBooks = stats.books.available;
 
-    const totalBooks = booksArr.length;
-    const availableBooks = booksArr.filter(b => b.is_available !== false).length;
-
-    const totalReq = reqArr.length;
-    const pendingReq = reqArr.filter(r => (r.status || "").toLowerCase() === "pending").length;
+    const totalReq = stats.requests.total;
+    const pendingReq = stats.requests.pending;
 
     // audit viene paginado: {items, total, ...}
     const totalAudit = audit?.total ?? "—";
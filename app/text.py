@@ -0,0 +1,13 @@
+import unicodedata
+
+
+def normalize_text(value: str | None) -> str | None:
+    """
+    Forma canónica para buscar/comparar texto en castellano:
+    NFKD, sin acentos ni diacríticos (ñ -> n), casefold y espacios colapsados.
+    """
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
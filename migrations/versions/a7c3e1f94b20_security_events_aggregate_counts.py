@@ -0,0 +1,36 @@
+"""Security events: aggregate count, first_seen and last_seen
+
+Revision ID: a7c3e1f94b20
+Revises: ce33683facb1
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e1f94b20'
+down_revision = 'ce33683facb1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("security_events") as batch:
+        batch.add_column(sa.Column("count", sa.Integer(), nullable=False, server_default="1"))
+        batch.add_column(sa.Column("first_seen", sa.DateTime(timezone=True), nullable=True))
+        batch.add_column(sa.Column("last_seen", sa.DateTime(timezone=True), nullable=True))
+
+    # filas existentes = eventos sueltos
+    op.execute(
+        "UPDATE security_events SET first_seen = created_at, last_seen = created_at "
+        "WHERE first_seen IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("security_events") as batch:
+        batch.drop_column("last_seen")
+        batch.drop_column("first_seen")
+        batch.drop_column("count")
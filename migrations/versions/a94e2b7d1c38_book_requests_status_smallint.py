@@ -0,0 +1,109 @@
+"""Book requests: status stored as a small integer enum
+
+Revision ID: a94e2b7d1c38
+Revises: f61a8d3c2e57
+Create Date: 2026-10-17 14:06:51.442917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a94e2b7d1c38'
+down_revision = 'f61a8d3c2e57'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# mismo mapeo que app.models.book_request.STATUS_CODES (congelado aquí)
+STATUS_CODES = {"pending": 1, "accepted": 2, "rejected": 3, "cancelled": 4}
+
+INDEXES = {
+    "ix_book_requests_status_id": ["status", "id"],
+    "ix_book_requests_book_id_status": ["book_id", "status"],
+    "ix_book_requests_requester_id_status": ["requester_id", "status"],
+}
+
+book_requests = sa.table(
+    "book_requests",
+    sa.column("id", sa.Integer),
+    sa.column("status", sa.String),
+    sa.column("status_code", sa.SmallInteger),
+)
+
+
+def _folded_status():
+    # "PENDING", " pending" ... -> "pending"
+    return sa.func.lower(sa.func.trim(book_requests.c.status))
+
+
+def _check_statuses(conn):
+    """
+    Antes de cualquier DDL: en SQLite el DDL no es transaccional y un fallo
+    a mitad dejaría status_code creada (la repetición chocaría con ella).
+    """
+    found = {row[0] for row in conn.execute(sa.select(_folded_status()).distinct())}
+    unknown = found - set(STATUS_CODES)
+    if unknown:
+        raise RuntimeError(f"book_requests with unknown status: {sorted(unknown, key=str)}")
+
+
+def _backfill(conn):
+    """UPDATE por rangos de id: transacciones cortas aunque la tabla sea grande."""
+    max_id = conn.execute(sa.select(sa.func.max(book_requests.c.id))).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        conn.execute(
+            book_requests.update()
+            .where(book_requests.c.id > start, book_requests.c.id <= start + BATCH_SIZE)
+            .values(status_code=sa.case(STATUS_CODES, value=_folded_status()))
+        )
+
+
+def upgrade():
+    _check_statuses(op.get_bind())
+
+    with op.batch_alter_table("book_requests") as batch:
+        batch.add_column(sa.Column("status_code", sa.SmallInteger(), nullable=True))
+
+    _backfill(op.get_bind())
+
+    with op.batch_alter_table("book_requests") as batch:
+        for name in INDEXES:
+            batch.drop_index(name)
+        batch.drop_column("status")
+        batch.alter_column(
+            "status_code", new_column_name="status",
+            existing_type=sa.SmallInteger(), nullable=False,
+        )
+
+    with op.batch_alter_table("book_requests") as batch:
+        for name, columns in INDEXES.items():
+            batch.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    names = {code: name for name, code in STATUS_CODES.items()}
+    conn = op.get_bind()
+
+    with op.batch_alter_table("book_requests") as batch:
+        batch.add_column(sa.Column("status_text", sa.String(length=20), nullable=True))
+
+    status_text = sa.table(
+        "book_requests", sa.column("status", sa.SmallInteger), sa.column("status_text", sa.String),
+    )
+    conn.execute(status_text.update().values(status_text=sa.case(names, value=status_text.c.status)))
+
+    with op.batch_alter_table("book_requests") as batch:
+        for name in INDEXES:
+            batch.drop_index(name)
+        batch.drop_column("status")
+        batch.alter_column(
+            "status_text", new_column_name="status",
+            existing_type=sa.String(length=20), nullable=False,
+        )
+
+    with op.batch_alter_table("book_requests") as batch:
+        for name, columns in INDEXES.items():
+            batch.create_index(name, columns, unique=False)
@@ -0,0 +1,106 @@
+"""Books: denormalized pending/accepted request counters
+
+Revision ID: b07c5e9f3a21
+Revises: a94e2b7d1c38
+Create Date: 2026-10-17 14:52:10.906377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b07c5e9f3a21'
+down_revision = 'a94e2b7d1c38'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# códigos de book_requests.status (a94e2b7d1c38)
+PENDING, ACCEPTED = 1, 2
+
+books = sa.table(
+    "books",
+    sa.column("id", sa.Integer),
+    sa.column("pending_count", sa.Integer),
+    sa.column("accepted_count", sa.Integer),
+)
+book_requests = sa.table(
+    "book_requests",
+    sa.column("id", sa.Integer),
+    sa.column("book_id", sa.Integer),
+    sa.column("status", sa.SmallInteger),
+)
+
+
+def _count(status):
+    return (
+        sa.select(sa.func.count(book_requests.c.id))
+        .where(book_requests.c.book_id == books.c.id, book_requests.c.status == status)
+        .scalar_subquery()
+    )
+
+
+def _backfill(conn):
+    max_id = conn.execute(sa.select(sa.func.max(books.c.id))).scalar() or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        conn.execute(
+            books.update()
+            .where(books.c.id > start, books.c.id <= start + BATCH_SIZE)
+            .values(pending_count=_count(PENDING), accepted_count=_count(ACCEPTED))
+        )
+
+
+# DDL congelada de los triggers de books_fts tal y como estaban en esta
+# revisión (no importar app/: la migración no debe cambiar con el código)
+FTS_TRIGGERS_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, description ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO books_fts(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+]
+
+
+def _restore_fts_triggers(conn):
+    """En SQLite drop_column recrea books y se lleva los triggers de books_fts."""
+    if conn.dialect.name != "sqlite":
+        return
+    installed = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).first()
+    if installed:
+        for ddl in FTS_TRIGGERS_DDL:
+            conn.exec_driver_sql(ddl)
+
+
+def upgrade():
+    with op.batch_alter_table("books") as batch:
+        batch.add_column(sa.Column("pending_count", sa.Integer(), server_default="0", nullable=False))
+        batch.add_column(sa.Column("accepted_count", sa.Integer(), server_default="0", nullable=False))
+
+    _backfill(op.get_bind())
+
+
+def downgrade():
+    with op.batch_alter_table("books") as batch:
+        batch.drop_column("accepted_count")
+        batch.drop_column("pending_count")
+
+    _restore_fts_triggers(op.get_bind())
@@ -0,0 +1,78 @@
+"""Add books_fts full-text search index (SQLite FTS5)
+
+Revision ID: b41d7e2c9a83
+Revises: a7c3e1f94b20
+Create Date: 2026-10-17 10:03:11.502377
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41d7e2c9a83'
+down_revision = 'a7c3e1f94b20'
+branch_labels = None
+depends_on = None
+
+
+# DDL congelada tal y como estaba en esta revisión (no importar app/:
+# la migración no debe cambiar con el código)
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author, description,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, description ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO books_fts(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+]
+
+FTS_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS books_fts_ai",
+    "DROP TRIGGER IF EXISTS books_fts_ad",
+    "DROP TRIGGER IF EXISTS books_fts_au",
+    "DROP TABLE IF EXISTS books_fts",
+]
+
+
+def _supports_fts5(conn) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    rows = conn.exec_driver_sql("PRAGMA compile_options").fetchall()
+    return any(r[0] == "ENABLE_FTS5" for r in rows)
+
+
+def upgrade():
+    conn = op.get_bind()
+    # en motores sin FTS5 la búsqueda sigue usando LIKE
+    if _supports_fts5(conn):
+        for ddl in FTS_DDL:
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        for ddl in FTS_DROP_DDL:
+            conn.exec_driver_sql(ddl)
@@ -0,0 +1,27 @@
+"""Book requests: (requester_id, created_at) index for the requester history
+
+Revision ID: c3d8a6f0b912
+Revises: b07c5e9f3a21
+Create Date: 2026-10-17 15:20:37.118254
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d8a6f0b912'
+down_revision = 'b07c5e9f3a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("book_requests") as batch:
+        batch.create_index(
+            "ix_book_requests_requester_id_created_at", ["requester_id", "created_at"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("book_requests") as batch:
+        batch.drop_index("ix_book_requests_requester_id_created_at")
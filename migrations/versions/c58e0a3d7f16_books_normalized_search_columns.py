@@ -0,0 +1,156 @@
+"""Books: accent/case-folded shadow columns for search and filters
+
+Revision ID: c58e0a3d7f16
+Revises: b41d7e2c9a83
+Create Date: 2026-10-17 10:41:52.730914
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58e0a3d7f16'
+down_revision = 'b41d7e2c9a83'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# DDL congelada de los triggers de books_fts tal y como estaban en esta
+# revisión (no importar app/: la migración no debe cambiar con el código)
+FTS_TRIGGERS_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, description ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO books_fts(rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+]
+
+
+def _restore_fts_triggers(conn):
+    """En SQLite drop_column recrea books y se lleva los triggers de books_fts."""
+    if conn.dialect.name != "sqlite":
+        return
+    installed = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).first()
+    if installed:
+        for ddl in FTS_TRIGGERS_DDL:
+            conn.exec_driver_sql(ddl)
+
+books = sa.table(
+    "books",
+    sa.column("id", sa.Integer),
+    sa.column("title", sa.String),
+    sa.column("author", sa.String),
+    sa.column("genre", sa.String),
+    sa.column("language", sa.String),
+    sa.column("title_norm", sa.String),
+    sa.column("author_norm", sa.String),
+    sa.column("genre_norm", sa.String),
+    sa.column("language_norm", sa.String),
+)
+
+
+def normalize_text(value):
+    # copia congelada de app.text.normalize_text en esta revisión
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def _backfill(conn):
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(books.c.id, books.c.title, books.c.author, books.c.genre, books.c.language)
+            .where(books.c.id > last_id)
+            .order_by(books.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        conn.execute(
+            books.update()
+            .where(books.c.id == sa.bindparam("b_id"))
+            .values(
+                title_norm=sa.bindparam("t"),
+                author_norm=sa.bindparam("a"),
+                genre_norm=sa.bindparam("g"),
+                language_norm=sa.bindparam("l"),
+            ),
+            [
+                {
+                    "b_id": r.id,
+                    "t": normalize_text(r.title),
+                    "a": normalize_text(r.author),
+                    "g": normalize_text(r.genre),
+                    "l": normalize_text(r.language),
+                }
+                for r in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    with op.batch_alter_table("books") as batch:
+        batch.add_column(sa.Column("title_norm", sa.String(length=255), nullable=True))
+        batch.add_column(sa.Column("author_norm", sa.String(length=255), nullable=True))
+        batch.add_column(sa.Column("genre_norm", sa.String(length=100), nullable=True))
+        batch.add_column(sa.Column("language_norm", sa.String(length=50), nullable=True))
+
+    _backfill(op.get_bind())
+
+    with op.batch_alter_table("books") as batch:
+        batch.create_index("ix_books_title_norm", ["title_norm"], unique=False)
+        batch.create_index("ix_books_author_norm", ["author_norm"], unique=False)
+        batch.create_index("ix_books_genre_norm", ["genre_norm"], unique=False)
+        batch.create_index("ix_books_language_norm", ["language_norm"], unique=False)
+
+        # las consultas ya no filtran por las columnas originales
+        batch.drop_index("ix_books_title")
+        batch.drop_index("ix_books_author")
+        batch.drop_index("ix_books_genre")
+        batch.drop_index("ix_books_language")
+
+
+def downgrade():
+    with op.batch_alter_table("books") as batch:
+        batch.create_index("ix_books_language", ["language"], unique=False)
+        batch.create_index("ix_books_genre", ["genre"], unique=False)
+        batch.create_index("ix_books_author", ["author"], unique=False)
+        batch.create_index("ix_books_title", ["title"], unique=False)
+
+        batch.drop_index("ix_books_language_norm")
+        batch.drop_index("ix_books_genre_norm")
+        batch.drop_index("ix_books_author_norm")
+        batch.drop_index("ix_books_title_norm")
+
+        batch.drop_column("language_norm")
+        batch.drop_column("genre_norm")
+        batch.drop_column("author_norm")
+        batch.drop_column("title_norm")
+
+    _restore_fts_triggers(op.get_bind())
@@ -0,0 +1,25 @@
+"""Books: composite (created_at, id) index for keyset pagination
+
+Revision ID: d2f9b6a1c047
+Revises: c58e0a3d7f16
+Create Date: 2026-10-17 11:20:05.664021
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f9b6a1c047'
+down_revision = 'c58e0a3d7f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("books") as batch:
+        batch.create_index("ix_books_created_at_id", ["created_at", "id"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("books") as batch:
+        batch.drop_index("ix_books_created_at_id")
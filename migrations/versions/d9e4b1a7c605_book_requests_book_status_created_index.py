@@ -0,0 +1,30 @@
+"""Book requests: (book_id, status, created_at) index for the donor inbox
+
+Revision ID: d9e4b1a7c605
+Revises: c3d8a6f0b912
+Create Date: 2026-10-17 15:47:02.583910
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e4b1a7c605'
+down_revision = 'c3d8a6f0b912'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("book_requests") as batch:
+        batch.create_index(
+            "ix_book_requests_book_id_status_created_at", ["book_id", "status", "created_at"], unique=False
+        )
+        # mismo prefijo: el índice nuevo lo sustituye
+        batch.drop_index("ix_book_requests_book_id_status")
+
+
+def downgrade():
+    with op.batch_alter_table("book_requests") as batch:
+        batch.create_index("ix_book_requests_book_id_status", ["book_id", "status"], unique=False)
+        batch.drop_index("ix_book_requests_book_id_status_created_at")
@@ -0,0 +1,34 @@
+"""Security events: agg_key + bucket_start unique index for the upsert
+
+Revision ID: e5a1c7d3b946
+Revises: d9e4b1a7c605
+Create Date: 2026-10-17 18:05:31.402716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1c7d3b946'
+down_revision = 'd9e4b1a7c605'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filas existentes: agg_key NULL, nunca chocan (NULL distinto de NULL);
+    # solo se pliegan los eventos escritos desde aquí
+    with op.batch_alter_table("security_events") as batch:
+        batch.add_column(sa.Column("agg_key", sa.String(length=40), nullable=True))
+        batch.add_column(sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=True))
+        batch.create_index(
+            "ux_security_events_agg_key_bucket", ["agg_key", "bucket_start"], unique=True
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("security_events") as batch:
+        batch.drop_index("ux_security_events_agg_key_bucket")
+        batch.drop_column("bucket_start")
+        batch.drop_column("agg_key")
@@ -0,0 +1,29 @@
+"""Add table_generations change counters
+
+Revision ID: e83a4c5b2d19
+Revises: d2f9b6a1c047
+Create Date: 2026-10-17 12:02:47.205318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83a4c5b2d19'
+down_revision = 'd2f9b6a1c047'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table = op.create_table('table_generations',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('generation', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table, [{"name": "books", "generation": 0}])
+
+
+def downgrade():
+    op.drop_table('table_generations')
@@ -0,0 +1,34 @@
+"""Book requests: composite indexes for admin filters and keyset pagination
+
+Revision ID: f61a8d3c2e57
+Revises: e83a4c5b2d19
+Create Date: 2026-10-17 13:41:22.318604
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f61a8d3c2e57'
+down_revision = 'e83a4c5b2d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("book_requests") as batch:
+        batch.create_index("ix_book_requests_status_id", ["status", "id"], unique=False)
+        batch.create_index("ix_book_requests_book_id_status", ["book_id", "status"], unique=False)
+        batch.create_index("ix_book_requests_requester_id_status", ["requester_id", "status"], unique=False)
+        # cubiertos por los compuestos (misma columna en cabeza)
+        batch.drop_index("ix_book_requests_book_id")
+        batch.drop_index("ix_book_requests_requester_id")
+
+
+def downgrade():
+    with op.batch_alter_table("book_requests") as batch:
+        batch.create_index("ix_book_requests_requester_id", ["requester_id"], unique=False)
+        batch.create_index("ix_book_requests_book_id", ["book_id"], unique=False)
+        batch.drop_index("ix_book_requests_requester_id_status")
+        batch.drop_index("ix_book_requests_book_id_status")
+        batch.drop_index("ix_book_requests_status_id")
@@ -6,7 +6,10 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 from sqlalchemy.pool import StaticPool
 
 from app.extensions import db
@@ -27,6 +30,7 @@ def app():
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
         "SECRET_KEY": "test-secret",
         "WTF_CSRF_ENABLED": False,
+        "BOOK_INDEX_WARMUP": False,
     }
 
     # ✅ IMPORTANT: pass overrides INTO create_app
@@ -45,6 +49,49 @@ def client(app):
     return app.test_client()
 
 
+class QueryLog:
+    """Sentencias SQL ejecutadas dentro de un bloque count_queries()."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def matching(self, fragment: str) -> list[str]:
+        fragment = fragment.lower()
+        return [s for s in self.statements if fragment in s.lower()]
+
+    def selects(self, table: str | None = None) -> list[str]:
+        selects = [s for s in self.statements if s.lstrip().upper().startswith("SELECT")]
+        if table is None:
+            return selects
+        return [s for s in selects if f"FROM {table}" in s]
+
+    def clear(self) -> None:
+        self.statements.clear()
+
+
+@pytest.fixture()
+def count_queries(app):
+    """
+    with count_queries() as queries:
+        client.get(...)
+    assert len(queries.selects("books")) == 1
+    """
+    @contextmanager
+    def _count():
+        log = QueryLog()
+
+        def before_cursor_execute(conn, cursor, statement, params, context, executemany):
+            log.statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield log
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    return _count
+
+
 def ensure_user(user_id: int, role: str = "reader", is_active: bool = True, is_blocked: bool = False):
     user = db.session.get(User, user_id)
     if user is None:
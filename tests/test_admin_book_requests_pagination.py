@@ -0,0 +1,56 @@
+from sqlalchemy import inspect
+
+from app.extensions import db
+from app.models import Book
+from app.models.book_request import BookRequest
+from tests.conftest import ensure_user, login_session
+
+
+def _seed(n):
+    ensure_user(10)
+    book = Book(title="A", author="X", donor_id=10)
+    db.session.add(book)
+    db.session.flush()
+    for i in range(n):
+        db.session.add(BookRequest(
+            book_id=book.id, requester_id=10, status="pending" if i % 2 else "rejected",
+        ))
+    db.session.commit()
+
+
+def _walk(client, qs):
+    seen, cursor = [], None
+    while True:
+        url = f"/api/admin/book-requests?{qs}" + (f"&cursor={cursor}" if cursor else "")
+        res = client.get(url)
+        assert res.status_code == 200
+        data = res.get_json()
+        seen.extend(r["id"] for r in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_admin_book_requests_pages_with_cursor(client):
+    login_session(client, user_id=3, role="admin")
+    _seed(7)
+
+    first = client.get("/api/admin/book-requests?limit=3").get_json()
+    assert [r["id"] for r in first["items"]] == [7, 6, 5]
+    assert first["next_cursor"]
+
+    assert _walk(client, "limit=3") == [7, 6, 5, 4, 3, 2, 1]
+    assert _walk(client, "limit=2&status=pending") == [6, 4, 2]
+
+
+def test_admin_book_requests_rejects_bad_cursor(client):
+    login_session(client, user_id=3, role="admin")
+    assert client.get("/api/admin/book-requests?cursor=nope").status_code == 400
+    assert client.get("/api/admin/book-requests?limit=x").status_code == 400
+
+
+def test_book_requests_composite_indexes(app):
+    indexes = {ix["name"]: ix["column_names"] for ix in inspect(db.engine).get_indexes("book_requests")}
+    assert indexes["ix_book_requests_status_id"] == ["status", "id"]
+    assert indexes["ix_book_requests_book_id_status_created_at"] == ["book_id", "status", "created_at"]
+    assert indexes["ix_book_requests_requester_id_status"] == ["requester_id", "status"]
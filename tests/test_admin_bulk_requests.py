@@ -0,0 +1,85 @@
+from app.extensions import db
+from app.models import AdminAction, Book
+from app.models.book_request import BookRequest
+from tests.conftest import ensure_user, login_session
+
+
+def _seed():
+    ensure_user(2)
+    for uid in (10, 11, 12):
+        ensure_user(uid)
+    a = Book(title="A", author="X", donor_id=2, pending_count=2)
+    b = Book(title="B", author="X", donor_id=2, pending_count=1)
+    db.session.add_all([a, b])
+    db.session.flush()
+    reqs = [
+        BookRequest(book_id=a.id, requester_id=10),
+        BookRequest(book_id=a.id, requester_id=11),
+        BookRequest(book_id=b.id, requester_id=12),
+    ]
+    db.session.add_all(reqs)
+    db.session.commit()
+    return a.id, b.id, [r.id for r in reqs]
+
+
+def _book(book_id):
+    db.session.expire_all()
+    b = db.session.get(Book, book_id)
+    return b.pending_count, b.accepted_count, b.is_available
+
+
+def test_bulk_applies_transitions_and_reports_per_item(client):
+    a, b, (r1, r2, r3) = _seed()
+    login_session(client, user_id=3, role="admin")
+
+    res = client.patch("/api/admin/book-requests/bulk", json={"items": [
+        {"id": r1, "status": "accepted"},
+        {"id": r2, "status": "accepted"},   # mismo libro: conflicto
+        {"id": r3, "status": "rejected"},
+        {"id": 999, "status": "rejected"},
+    ]})
+    assert res.status_code == 200
+    data = res.get_json()
+
+    by_id = {r["id"]: r for r in data["results"]}
+    assert by_id[r1]["ok"] and by_id[r1]["old_status"] == "pending"
+    assert by_id[r2]["error"] == "book_not_available"
+    assert by_id[r3]["ok"] and by_id[r3]["status"] == "rejected"
+    assert by_id[999]["error"] == "not_found"
+    assert (data["applied"], data["failed"]) == (2, 2)
+
+    assert _book(a) == (1, 1, False)
+    assert _book(b) == (0, 0, True)
+    assert db.session.get(BookRequest, r2).status == "pending"
+
+    actions = AdminAction.query.filter(AdminAction.target_type == "request").all()
+    assert sorted(x.target_id for x in actions) == [r1, r3]
+
+
+def test_bulk_uses_set_based_statements(client, count_queries):
+    a, b, (r1, r2, r3) = _seed()
+    login_session(client, user_id=3, role="admin")
+
+    with count_queries() as queries:
+        res = client.patch("/api/admin/book-requests/bulk", json={"items": [
+            {"id": r1, "status": "rejected"},
+            {"id": r2, "status": "rejected"},
+            {"id": r3, "status": "rejected"},
+        ]})
+
+    assert res.get_json()["applied"] == 3
+    assert len(queries.matching("UPDATE book_requests")) == 1
+    assert _book(a) == (0, 0, True)
+
+
+def test_bulk_validates_payload_and_permissions(client):
+    _, _, (r1, _, _) = _seed()
+
+    login_session(client, user_id=4, role="moderator")
+    res = client.patch("/api/admin/book-requests/bulk", json={"items": [{"id": r1, "status": "accepted"}]})
+    assert res.status_code == 403
+
+    login_session(client, user_id=3, role="admin")
+    assert client.patch("/api/admin/book-requests/bulk", json={"items": []}).status_code == 400
+    res = client.patch("/api/admin/book-requests/bulk", json={"items": [{"id": r1, "status": "cancelled"}]})
+    assert res.status_code == 400
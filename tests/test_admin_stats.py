@@ -0,0 +1,51 @@
+from app.extensions import db
+from app.models import Book
+from app.models.book_request import BookRequest
+from tests.conftest import ensure_user, login_session
+
+
+def _seed():
+    ensure_user(10, role="reader", is_blocked=True)
+    ensure_user(11, role="reader", is_active=False)
+    a = Book(title="A", author="X", donor_id=10, is_available=True)
+    b = Book(title="B", author="X", donor_id=10, is_available=False)
+    db.session.add_all([a, b])
+    db.session.flush()
+    db.session.add_all([
+        BookRequest(book_id=a.id, requester_id=11, status="pending"),
+        BookRequest(book_id=b.id, requester_id=11, status="accepted"),
+        BookRequest(book_id=a.id, requester_id=10, status="pending"),
+    ])
+    db.session.commit()
+
+
+def test_admin_stats_returns_grouped_counts(client):
+    login_session(client, user_id=3, role="admin")
+    _seed()
+
+    res = client.get("/api/admin/stats")
+    assert res.status_code == 200
+    data = res.get_json()
+
+    assert data["users"] == {"total": 3, "blocked": 1, "inactive": 1, "by_role": {"admin": 1, "reader": 2}}
+    assert data["books"] == {"total": 2, "available": 1}
+    assert data["requests"]["total"] == 3
+    assert data["requests"]["pending"] == 2
+    assert data["requests"]["by_status"] == {"pending": 2, "accepted": 1}
+
+
+def test_admin_stats_is_cached_briefly(client, app):
+    login_session(client, user_id=3, role="admin")
+    assert client.get("/api/admin/stats").get_json()["books"]["total"] == 0
+
+    db.session.add(Book(title="A", author="X", donor_id=3))
+    db.session.commit()
+    assert client.get("/api/admin/stats").get_json()["books"]["total"] == 0
+
+    app.extensions["admin_stats_cache"].clear()
+    assert client.get("/api/admin/stats").get_json()["books"]["total"] == 1
+
+
+def test_admin_stats_forbidden_for_readers(client):
+    login_session(client, user_id=1, role="reader")
+    assert client.get("/api/admin/stats").status_code == 403
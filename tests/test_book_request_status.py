@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import Book
+from app.models.book_request import BookRequest
+from tests.conftest import ensure_user, login_session
+
+
+def _book(donor_id=2):
+    ensure_user(donor_id)
+    book = Book(title="A", author="X", donor_id=donor_id)
+    db.session.add(book)
+    db.session.commit()
+    return book
+
+
+def test_status_is_stored_as_small_integer_and_read_canonical(app):
+    book = _book()
+    ensure_user(1)
+    req = BookRequest(book_id=book.id, requester_id=1, status="ACCEPTED")
+    assert req.status == "accepted"
+    db.session.add(req)
+    db.session.commit()
+
+    raw = db.session.execute(text("SELECT status FROM book_requests WHERE id = :id"), {"id": req.id}).scalar()
+    assert raw == 2
+
+    db.session.expire_all()
+    assert db.session.get(BookRequest, req.id).status == "accepted"
+    assert BookRequest.query.filter(BookRequest.status == "Accepted").count() == 1
+
+
+def test_unknown_status_is_rejected(app):
+    with pytest.raises(ValueError):
+        BookRequest(book_id=1, requester_id=1, status="approved")
+
+
+def test_requester_flow_and_admin_filter_agree_on_status(client):
+    book = _book()
+    login_session(client, user_id=1)
+    res = client.post("/requests/", json={"book_id": book.id})
+    assert res.status_code == 201
+    assert res.get_json()["status"] == "pending"
+
+    login_session(client, user_id=3, role="admin")
+    items = client.get("/api/admin/book-requests?status=pending").get_json()["items"]
+    assert [r["id"] for r in items] == [res.get_json()["id"]]
@@ -0,0 +1,46 @@
+from tests.conftest import login_session
+
+
+def _create(client, title):
+    return client.post("/books/", json={"title": title, "author": "Autor"}).get_json()["id"]
+
+
+def test_batch_get_preserves_order_and_reports_missing(client):
+    login_session(client, user_id=1)
+    a, b, c = (_create(client, t) for t in ("A", "B", "C"))
+
+    data = client.get(f"/books/batch?ids={c},999,{a},{c}").get_json()
+    assert [x["title"] for x in data["items"]] == ["C", "A"]
+    assert data["missing"] == [999]
+    assert data["items"][0] == client.get(f"/books/{c}").get_json()
+
+
+def test_batch_post_uses_a_single_query(client, count_queries):
+    login_session(client, user_id=1)
+    ids = [_create(client, f"Libro {i}") for i in range(5)]
+
+    with count_queries() as queries:
+        data = client.post("/books/batch", json={"ids": ids[::-1]}).get_json()
+
+    assert [x["id"] for x in data["items"]] == ids[::-1]
+    assert len(queries.selects("books")) == 1
+
+
+def test_batch_post_accepts_a_bare_list(client):
+    login_session(client, user_id=1)
+    ids = [_create(client, f"Libro {i}") for i in range(3)]
+
+    data = client.post("/books/batch", json=[ids[2], ids[0], 999]).get_json()
+
+    assert [x["id"] for x in data["items"]] == [ids[2], ids[0]]
+    assert data["missing"] == [999]
+
+
+def test_batch_validates_ids(client):
+    login_session(client, user_id=1)
+    assert client.get("/books/batch").status_code == 400
+    assert client.get("/books/batch?ids=1,x").status_code == 400
+    assert client.post("/books/batch", json={"ids": "1,2"}).status_code == 200
+    assert client.post("/books/batch", json={"ids": list(range(1, 300))}).status_code == 400
+    assert client.post("/books/batch", json="1,2").status_code == 400
+    assert client.post("/books/batch", json=7).status_code == 400
@@ -0,0 +1,60 @@
+from tests.conftest import ensure_user, login_session
+
+
+def _create(client, title):
+    return client.post("/books/", json={"title": title, "author": "Autor"}).get_json()["id"]
+
+
+def test_detail_etag_304_until_book_changes(client):
+    ensure_user(2)
+    login_session(client, user_id=1)
+    book_id = _create(client, "Rayuela")
+
+    first = client.get(f"/books/{book_id}")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+    # otra representación (fields=) -> otro ETag
+    assert client.get(f"/books/{book_id}?fields=title").headers["ETag"] != etag
+
+    # una solicitud mueve pending_count -> cambia updated_at
+    login_session(client, user_id=2)
+    assert client.post("/requests/", json={"book_id": book_id}).status_code == 201
+    changed = client.get(f"/books/{book_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_list_and_search_etag_follow_generation(client):
+    login_session(client, user_id=1)
+    _create(client, "Ficciones")
+
+    for url in ("/books/?limit=5", "/books/search?q=ficciones"):
+        etag = client.get(url).headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    etag = client.get("/books/").headers["ETag"]
+    _create(client, "El Aleph")
+    resp = client.get("/books/", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert len(resp.get_json()["items"]) == 2
+
+
+def test_max_age_is_configurable(client, app):
+    app.config["BOOKS_LIST_MAX_AGE"] = 15
+    login_session(client, user_id=1)
+    assert client.get("/books/").headers["Cache-Control"] == "private, max-age=15"
+
+
+def test_escaped_query_values_get_their_own_etag(client):
+    login_session(client, user_id=1)
+    _create(client, "Ficciones")
+
+    plain = client.get("/books/search?genre=x&q=y").headers["ETag"]
+    escaped = client.get("/books/search?genre=x%26q%3Dy").headers["ETag"]
+    assert plain != escaped
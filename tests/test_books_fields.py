@@ -0,0 +1,41 @@
+from tests.conftest import login_session
+
+
+def _create(client, title):
+    return client.post("/books/", json={"title": title, "author": "Autor", "description": "larga"}).get_json()["id"]
+
+
+def test_list_fields_selects_only_requested_columns(client, count_queries):
+    login_session(client, user_id=1)
+    _create(client, "Rayuela")
+
+    with count_queries() as queries:
+        data = client.get("/books/?fields=title").get_json()
+    selects = queries.selects("books")
+
+    assert data["items"] == [{"id": data["items"][0]["id"], "title": "Rayuela"}]
+    assert "description" not in selects[-1]
+    assert "author" not in selects[-1]
+
+
+def test_fields_on_detail_and_search(client):
+    login_session(client, user_id=1)
+    book_id = _create(client, "Ficciones")
+
+    assert client.get(f"/books/{book_id}?fields=title,updated_at").get_json().keys() == {"id", "title", "updated_at"}
+
+    items = client.get("/books/search?q=ficciones&fields=author").get_json()["items"]
+    assert items == [{"id": book_id, "author": "Autor"}]
+
+
+def test_default_fields_unchanged_and_unknown_rejected(client):
+    login_session(client, user_id=1)
+    book_id = _create(client, "Aleph")
+
+    detail = client.get(f"/books/{book_id}").get_json()
+    assert {"description", "accepted_count", "updated_at"} <= detail.keys()
+    assert "description" not in client.get("/books/").get_json()["items"][0]
+
+    resp = client.get("/books/?fields=title,title_norm")
+    assert resp.status_code == 400
+    assert "title_norm" in resp.get_json()["message"]
@@ -0,0 +1,52 @@
+from app.extensions import db
+from app.models import Book
+from app.services.book_search import fts_enabled
+from tests.conftest import login_session
+
+
+def _create(client, **data):
+    payload = {"genre": "Novela", "language": "es", "description": None}
+    payload.update(data)
+    res = client.post("/books/", json=payload)
+    assert res.status_code == 201
+    return res.get_json()["id"]
+
+
+def test_search_uses_fts_index_and_ranks_by_relevance(client, app):
+    login_session(client, user_id=1)
+    by_description = _create(client, title="Ensayos", author="Varios", description="sobre el Quijote")
+    by_title = _create(client, title="El Quijote", author="Cervantes")
+    _create(client, title="Rayuela", author="Cortázar")
+
+    assert fts_enabled()
+
+    res = client.get("/books/search?q=quijote&sort=relevance")
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data["total"] == 2
+    assert [b["id"] for b in data["items"]] == [by_title, by_description]
+
+
+def test_search_is_accent_insensitive_and_prefix_based(client):
+    login_session(client, user_id=1)
+    _create(client, title="Rayuela", author="Julio Cortázar")
+
+    data = client.get("/books/search?q=cortaz").get_json()
+    assert [b["title"] for b in data["items"]] == ["Rayuela"]
+
+
+def test_fts_index_follows_updates(client, app):
+    login_session(client, user_id=1)
+    book_id = _create(client, title="Borrador", author="Anónimo")
+
+    book = db.session.get(Book, book_id)
+    book.title = "Cien años de soledad"
+    db.session.commit()
+
+    assert client.get("/books/search?q=borrador").get_json()["total"] == 0
+    assert client.get("/books/search?q=soledad").get_json()["total"] == 1
+
+
+def test_search_rejects_unknown_sort(client):
+    login_session(client, user_id=1)
+    assert client.get("/books/search?q=x&sort=popular").status_code == 400
@@ -0,0 +1,102 @@
+from app.extensions import db
+from app.models import Book
+from app.services.book_indexes import TrigramIndex
+from tests.conftest import login_session
+
+
+def _create(client, title, author, **extra):
+    res = client.post("/books/", json={"title": title, "author": author, **extra})
+    assert res.status_code == 201
+    return res.get_json()["id"]
+
+
+def test_fuzzy_search_resolves_misspelled_author(client):
+    login_session(client, user_id=1)
+    quijote = _create(client, "El Quijote", "Miguel de Cervantes")
+    _create(client, "Rayuela", "Julio Cortázar")
+
+    data = client.get("/books/search?q=cervates&fuzzy=1").get_json()
+
+    assert data["fuzzy"] is True
+    assert data["items"][0]["id"] == quijote
+    assert data["items"][0]["score"] >= 60
+
+
+def test_fuzzy_index_follows_create_update_and_delete(client, app):
+    login_session(client, user_id=1)
+    _create(client, "Rayuela", "Julio Cortázar")
+    assert client.get("/books/search?q=rayuela&fuzzy=1").get_json()["total"] == 1  # índice ya construido
+
+    book_id = _create(client, "Pedro Páramo", "Juan Rulfo")
+    assert client.get("/books/search?q=pedro paramo&fuzzy=1").get_json()["total"] == 1
+
+    book = db.session.get(Book, book_id)
+    book.title = "El llano en llamas"
+    db.session.commit()
+    items = client.get("/books/search?q=llano en lamas&fuzzy=1").get_json()["items"]
+    assert [b["id"] for b in items] == [book_id]
+
+    db.session.delete(book)
+    db.session.commit()
+    assert client.get("/books/search?q=llano en lamas&fuzzy=1").get_json()["total"] == 0
+
+
+def test_fuzzy_search_applies_sql_filters(client):
+    login_session(client, user_id=1)
+    _create(client, "Cien años de soledad", "García Márquez", genre="Novela")
+    _create(client, "Cien sonetos de amor", "Neruda", genre="Poesía")
+
+    data = client.get("/books/search?q=cien anos&fuzzy=1&genre=poesia").get_json()
+    assert [b["title"] for b in data["items"]] == ["Cien sonetos de amor"]
+
+
+def test_fuzzy_filters_apply_before_the_result_cap(client, app):
+    app.config["FUZZY_MAX_RESULTS"] = 2
+    login_session(client, user_id=1)
+    for i in range(3):
+        _create(client, f"Cien años de soledad {i}", "García Márquez", genre="Novela")
+    sonetos = _create(client, "Cien sonetos de amor", "Neruda", genre="Poesía")
+
+    data = client.get("/books/search?q=cien anos&fuzzy=1&genre=poesia").get_json()
+    assert [b["id"] for b in data["items"]] == [sonetos]
+    assert data["total"] == 1
+    assert data["total_is_estimate"] is False
+
+    # sin filtros el tope se alcanza: total es solo una cota
+    data = client.get("/books/search?q=cien anos&fuzzy=1").get_json()
+    assert data["total"] == 2
+    assert data["total_is_estimate"] is True
+
+
+def test_fuzzy_filters_check_only_ranked_candidates(client, app, count_queries):
+    app.config["FUZZY_MAX_RESULTS"] = 2
+    login_session(client, user_id=1)
+    for i in range(3):
+        _create(client, f"Cien años de soledad {i}", "García Márquez", genre="Novela")
+    sonetos = _create(client, "Cien sonetos de amor", "Neruda", genre="Poesía")
+    _create(client, "Odas elementales", "Neruda", genre="Poesía")
+
+    with count_queries() as queries:
+        data = client.get("/books/search?q=cien anos&fuzzy=1&genre=poesia").get_json()
+
+    assert [b["id"] for b in data["items"]] == [sonetos]
+    # el filtro SQL va acotado a los candidatos; la primera tanda (2) no
+    # tenía ninguno de poesía y se amplió
+    filters = [s for s in queries.selects("books") if "genre_norm" in s]
+    assert len(filters) == 2
+    assert all(" IN (" in s for s in filters)
+
+
+def test_fuzzy_requires_query(client):
+    login_session(client, user_id=1)
+    assert client.get("/books/search?fuzzy=1").status_code == 400
+
+
+def test_trigram_index_remove_cleans_postings(app):
+    index = TrigramIndex(refresh_interval=0)
+    index.ensure_ready()
+    index.upsert(1, "Rayuela", "Cortázar")
+    index.remove(1)
+
+    assert index.search("rayuela") == []
+    assert index._postings == {}
@@ -0,0 +1,84 @@
+import io
+import json
+
+from app.extensions import db
+from app.models import Book
+from app.services.book_import import import_books, iter_records
+from tests.conftest import ensure_user, login_session
+
+CSV = (
+    "title,author,genre,language\n"
+    "El Quijote,Cervantes,Novela,Español\n"
+    ",Sin título,,\n"
+    "Rayuela,Cortázar,Novela,Español\n"
+    "el quijote,CERVANTES,Clásico,\n"
+)
+
+
+def test_import_csv_upload_validates_and_skips_duplicates(client):
+    login_session(client, user_id=1)
+
+    res = client.post(
+        "/books/import",
+        data={"file": (io.BytesIO(CSV.encode()), "catalogo.csv")},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 200
+    report = res.get_json()
+    assert (report["read"], report["inserted"], report["skipped"], report["failed"]) == (4, 2, 1, 1)
+    assert report["errors"] == [{"line": 3, "error": "missing_fields", "missing": ["title"]}]
+
+    book = Book.query.filter_by(title="Rayuela").one()
+    assert (book.donor_id, book.title_norm, book.genre_norm) == (1, "rayuela", "novela")
+    assert client.get("/books/search?q=rayuela").get_json()["total"] == 1
+
+
+def test_import_jsonl_body_upserts_existing(client):
+    login_session(client, user_id=1)
+    client.post("/books/", json={"title": "Rayuela", "author": "Cortázar"})
+
+    body = "\n".join([
+        json.dumps({"title": "Rayuela", "author": "Cortázar", "genre": "Novela"}),
+        "{no es json",
+        json.dumps({"title": "Ficciones", "author": "Borges"}),
+    ])
+    res = client.post("/books/import?on_duplicate=upsert", data=body, content_type="application/x-ndjson")
+    report = res.get_json()
+    assert (report["inserted"], report["updated"], report["failed"]) == (1, 1, 1)
+    assert report["errors"][0] == {"line": 2, "error": "invalid_json"}
+
+    db.session.expire_all()
+    assert Book.query.filter_by(title="Rayuela").one().genre_norm == "novela"
+
+
+def test_import_commits_in_batches_and_reports_progress(app):
+    ensure_user(1)
+    lines = "\n".join(json.dumps({"title": f"Libro {i}", "author": "Autor"}) for i in range(7))
+    seen = []
+
+    report = import_books(
+        iter_records(io.BytesIO(lines.encode()), "jsonl"),
+        donor_id=1,
+        batch_size=3,
+        progress=lambda r: seen.append(r.inserted),
+    )
+
+    assert report.batches == 3
+    assert seen == [3, 6, 7]
+    assert Book.query.count() == 7
+
+
+def test_import_rejects_unknown_format(client):
+    login_session(client, user_id=1)
+    assert client.post("/books/import", data="x", content_type="text/plain").status_code == 400
+
+
+def test_import_cli(app, tmp_path):
+    ensure_user(1)
+    path = tmp_path / "libros.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    result = app.test_cli_runner().invoke(args=["books", "import", str(path), "--donor-id", "1"])
+    assert result.exit_code == 0, result.output
+    assert '"inserted": 2' in result.output
+    assert Book.query.count() == 2
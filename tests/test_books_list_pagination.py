@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import Book
+from tests.conftest import login_session
+
+
+def _seed(n, same_timestamp=False):
+    ts = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(n):
+        db.session.add(Book(
+            title=f"Libro {i}",
+            author="Autor",
+            donor_id=1,
+            created_at=ts if same_timestamp else ts.replace(minute=i),
+        ))
+    db.session.commit()
+
+
+def _walk(client, limit):
+    seen, cursor = [], None
+    while True:
+        url = f"/books/?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        res = client.get(url)
+        assert res.status_code == 200
+        data = res.get_json()
+        seen.extend(b["id"] for b in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_list_books_pages_with_cursor_newest_first(client):
+    login_session(client, user_id=1)
+    _seed(5)
+
+    first = client.get("/books/?limit=2").get_json()
+    assert len(first["items"]) == 2
+    assert first["items"][0]["title"] == "Libro 4"
+    assert first["next_cursor"]
+
+    assert _walk(client, limit=2) == [5, 4, 3, 2, 1]
+
+
+def test_list_books_cursor_breaks_timestamp_ties_by_id(client):
+    login_session(client, user_id=1)
+    _seed(5, same_timestamp=True)
+
+    assert _walk(client, limit=2) == [5, 4, 3, 2, 1]
+
+
+def test_list_books_rejects_bad_cursor_and_limit(client):
+    login_session(client, user_id=1)
+
+    assert client.get("/books/?cursor=not-a-cursor").status_code == 400
+    assert client.get("/books/?limit=abc").status_code == 400
@@ -0,0 +1,42 @@
+from app.extensions import db
+from app.models import Book
+from app.text import normalize_text
+from tests.conftest import login_session
+
+
+def test_normalize_text_folds_accents_case_and_spaces():
+    assert normalize_text("  El  Quijóte ") == "el quijote"
+    assert normalize_text("Peña") == "pena"
+    assert normalize_text(None) is None
+
+
+def test_book_write_populates_normalized_columns(client):
+    login_session(client, user_id=1)
+    res = client.post("/books/", json={
+        "title": "Peña Brava", "author": "Ñúñez", "genre": "Novela", "language": "Español",
+    })
+    book = db.session.get(Book, res.get_json()["id"])
+
+    assert (book.title_norm, book.author_norm) == ("pena brava", "nunez")
+    assert (book.genre_norm, book.language_norm) == ("novela", "espanol")
+
+
+def test_genre_and_language_filters_ignore_case_and_accents(client):
+    login_session(client, user_id=1)
+    client.post("/books/", json={"title": "A", "author": "B", "genre": "Novela", "language": "Español"})
+    client.post("/books/", json={"title": "C", "author": "D", "genre": "Poesía", "language": "Español"})
+
+    data = client.get("/books/search?genre=novela&language=espanol").get_json()
+    assert [b["title"] for b in data["items"]] == ["A"]
+
+    data = client.get("/books/search?genre=POESIA").get_json()
+    assert [b["title"] for b in data["items"]] == ["C"]
+
+
+def test_like_fallback_uses_normalized_columns(client, app):
+    login_session(client, user_id=1)
+    client.post("/books/", json={"title": "La casa de la Peña", "author": "Anónimo"})
+    app.extensions["books_fts"] = False  # simula una BD sin FTS5
+
+    data = client.get("/books/search?q=PENA").get_json()
+    assert data["total"] == 1
@@ -0,0 +1,89 @@
+import threading
+
+from app.cache import SingleFlight
+from tests.conftest import login_session
+
+
+def _create(client, title, genre="Novela"):
+    return client.post("/books/", json={"title": title, "author": "Autor", "genre": genre}).get_json()["id"]
+
+
+def test_repeated_search_served_from_cache(client, count_queries):
+    login_session(client, user_id=1)
+    _create(client, "Rayuela")
+
+    with count_queries() as queries:
+        first = client.get("/books/search?genre=novela").get_json()
+    assert queries.selects("books")
+
+    # misma consulta normalizada: ni filas ni conteo vuelven a la BD
+    with count_queries() as queries:
+        again = client.get("/books/search?genre=%20NOVELA%20").get_json()
+    assert queries.selects("books") == []
+    assert again == first
+
+
+def test_write_invalidates_cached_results(client):
+    login_session(client, user_id=1)
+    _create(client, "Rayuela")
+    assert client.get("/books/search?genre=novela").get_json()["total"] == 1
+
+    _create(client, "Ficciones")
+    assert client.get("/books/search?genre=novela").get_json()["total"] == 2
+
+
+class _CountingLock:
+    """Lock que avisa cada vez que alguien lo suelta (para sincronizar el test)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._released = threading.Condition()
+        self.exits = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+
+    def __exit__(self, *exc):
+        self._lock.release()
+        with self._released:
+            self.exits += 1
+            self._released.notify_all()
+
+    def wait_exits(self, n, timeout):
+        with self._released:
+            return self._released.wait_for(lambda: self.exits >= n, timeout)
+
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flights = SingleFlight()
+    # do() registra a cada llamador bajo _lock: 1 líder + 4 seguidores = 5 salidas
+    flights._lock = lock = _CountingLock()
+    calls, results = [], []
+    leader_running, release = threading.Event(), threading.Event()
+
+    def slow():
+        calls.append(1)
+        leader_running.set()
+        assert release.wait(5)
+        return "payload"
+
+    def worker():
+        results.append(flights.do("key", slow))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    assert leader_running.wait(5)
+
+    followers = [threading.Thread(target=worker) for _ in range(4)]
+    for t in followers:
+        t.start()
+    # el líder no termina hasta que los cuatro se han unido a su llamada
+    assert lock.wait_exits(5, timeout=5)
+    release.set()
+
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {"payload"}
@@ -0,0 +1,58 @@
+from app.services.generations import BOOKS, current_generation
+from tests.conftest import login_session
+
+
+def _create(client, title, genre="Novela"):
+    res = client.post("/books/", json={"title": title, "author": "Autor", "genre": genre})
+    assert res.status_code == 201
+
+
+def test_count_none_returns_has_more_without_total(client):
+    login_session(client, user_id=1)
+    for i in range(3):
+        _create(client, f"Libro {i}")
+
+    data = client.get("/books/search?count=none&per_page=2").get_json()
+    assert data["total"] is None
+    assert data["has_more"] is True
+    assert len(data["items"]) == 2
+
+    data = client.get("/books/search?count=none&per_page=2&page=2").get_json()
+    assert data["has_more"] is False
+
+
+def test_exact_count_is_cached_until_books_change(client, count_queries):
+    login_session(client, user_id=1)
+    _create(client, "Libro 1")
+
+    with count_queries() as queries:
+        assert client.get("/books/search?genre=novela").get_json()["total"] == 1
+        assert client.get("/books/search?genre=novela").get_json()["total"] == 1
+        assert len(queries.matching("count(")) == 1
+
+        _create(client, "Libro 2")
+        assert client.get("/books/search?genre=novela").get_json()["total"] == 2
+        assert len(queries.matching("count(")) == 2
+
+
+def test_estimate_reuses_stale_count(client):
+    login_session(client, user_id=1)
+    _create(client, "Libro 1")
+    assert client.get("/books/search?genre=novela").get_json()["total"] == 1
+
+    _create(client, "Libro 2")
+    data = client.get("/books/search?genre=novela&count=estimate").get_json()
+    assert data["total"] == 1
+    assert data["total_is_estimate"] is True
+
+
+def test_book_writes_bump_generation(client):
+    login_session(client, user_id=1)
+    before = current_generation(BOOKS)
+    _create(client, "Libro 1")
+    assert current_generation(BOOKS) == before + 1
+
+
+def test_count_rejects_unknown_mode(client):
+    login_session(client, user_id=1)
+    assert client.get("/books/search?count=maybe").status_code == 400
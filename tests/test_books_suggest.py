@@ -0,0 +1,92 @@
+from sqlalchemy import delete, insert
+
+from app.extensions import db
+from app.models import Book
+from app.services.book_indexes import prefix_index
+from tests.conftest import login_session
+
+
+def _create(client, title, author):
+    res = client.post("/books/", json={"title": title, "author": author})
+    assert res.status_code == 201
+    return res.get_json()["id"]
+
+
+def test_suggest_matches_word_prefixes_and_ranks_by_popularity(client):
+    login_session(client, user_id=1)
+    _create(client, "El Quijote", "Miguel de Cervantes")
+    _create(client, "Novelas ejemplares", "Miguel de Cervantes")
+    _create(client, "Cervantes y su época", "Ana Ruiz")
+
+    items = client.get("/books/suggest?prefix=cerv").get_json()["items"]
+    assert items[0] == {"text": "Miguel de Cervantes", "type": "author", "books": 2}
+    assert {"text": "Cervantes y su época", "type": "title", "books": 1} in items
+
+    items = client.get("/books/suggest?prefix=QUIJ").get_json()["items"]
+    assert [i["text"] for i in items] == ["El Quijote"]
+
+    items = client.get("/books/suggest?prefix=cerv&type=title").get_json()["items"]
+    assert [i["type"] for i in items] == ["title"]
+
+
+def test_suggest_picks_up_new_books_without_querying_db(client, count_queries):
+    login_session(client, user_id=1)
+    _create(client, "Rayuela", "Julio Cortázar")
+    assert client.get("/books/suggest?prefix=ray").get_json()["items"]  # índice construido
+
+    _create(client, "Rayo de luna", "Bécquer")
+
+    with count_queries() as queries:
+        items = client.get("/books/suggest?prefix=ray").get_json()["items"]
+
+    assert [i["text"] for i in items] == ["Rayuela", "Rayo de luna"]
+    assert queries.matching("books") == []
+
+
+def test_suggest_validates_params(client):
+    login_session(client, user_id=1)
+    assert client.get("/books/suggest?prefix=").get_json()["items"] == []
+    assert client.get("/books/suggest?prefix=a&type=genre").status_code == 400
+    assert client.get("/books/suggest?prefix=a&limit=x").status_code == 400
+
+
+def _next_sync(index):
+    index._checked_at -= index.refresh_interval + 1
+
+
+def test_suggest_drops_books_deleted_by_another_process(client, app):
+    login_session(client, user_id=1)
+    rayuela = _create(client, "Rayuela", "Julio Cortázar")
+    _create(client, "Rayo de luna", "Bécquer")
+    assert len(client.get("/books/suggest?prefix=ray").get_json()["items"]) == 2
+
+    # DELETE en Core: ningún listener de este proceso se entera
+    db.session.execute(delete(Book).where(Book.id == rayuela))
+    db.session.commit()
+    _next_sync(prefix_index())
+
+    items = client.get("/books/suggest?prefix=ray").get_json()["items"]
+    assert [i["text"] for i in items] == ["Rayo de luna"]
+
+
+def test_large_delta_rebuilds_the_index_sorted(client, app, monkeypatch):
+    login_session(client, user_id=1)
+    _create(client, "Rayuela", "Julio Cortázar")
+    assert client.get("/books/suggest?prefix=ray").get_json()["items"]
+
+    index = prefix_index()
+    monkeypatch.setattr(index, "REBUILD_THRESHOLD", 2)
+    builds = []
+    build = index._build
+    monkeypatch.setattr(index, "_build", lambda: builds.append(1) or build())
+    db.session.execute(insert(Book), [
+        dict(title=f"Rayos {i}", author="Anónimo", title_norm=f"rayos {i}", author_norm="anonimo", donor_id=1)
+        for i in range(3)
+    ])
+    db.session.commit()
+    _next_sync(index)
+
+    items = client.get("/books/suggest?prefix=rayos").get_json()["items"]
+    assert sorted(i["text"] for i in items) == ["Rayos 0", "Rayos 1", "Rayos 2"]
+    assert index._keys == sorted(index._keys)
+    assert builds == [1]
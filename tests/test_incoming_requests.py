@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import Book
+from app.models.book_request import BookRequest
+from tests.conftest import ensure_user, login_session
+
+
+def _seed():
+    ensure_user(2)
+    ensure_user(5)
+    ensure_user(10)
+    mine = Book(title="Mío", author="X", donor_id=2)
+    other = Book(title="Ajeno", author="Y", donor_id=5)
+    db.session.add_all([mine, other])
+    db.session.flush()
+
+    ts = datetime(2026, 1, 1, 12, 0, 0)
+    statuses = ["pending", "rejected", "pending", "accepted"]
+    for i, status in enumerate(statuses):
+        db.session.add(BookRequest(
+            book_id=mine.id, requester_id=10, status=status, created_at=ts.replace(minute=i),
+        ))
+    db.session.add(BookRequest(book_id=other.id, requester_id=10, created_at=ts))
+    db.session.commit()
+
+
+def test_incoming_lists_only_my_books_with_counts(client):
+    _seed()
+    login_session(client, user_id=2)
+
+    data = client.get("/requests/incoming?limit=3").get_json()
+    assert [r["status"] for r in data["items"]] == ["accepted", "pending", "rejected"]
+    assert data["items"][0]["book"]["title"] == "Mío"
+    assert data["counts"] == {"accepted": 1, "cancelled": 0, "pending": 2, "rejected": 1}
+
+    rest = client.get(f"/requests/incoming?limit=3&cursor={data['next_cursor']}").get_json()
+    assert [r["status"] for r in rest["items"]] == ["pending"]
+    assert rest["next_cursor"] is None
+
+
+def test_incoming_filters_by_status(client):
+    _seed()
+    login_session(client, user_id=2)
+
+    items = client.get("/requests/incoming?status=pending").get_json()["items"]
+    assert len(items) == 2
+    assert all(r["status"] == "pending" for r in items)
+
+    assert client.get("/requests/incoming?status=nope").status_code == 400
@@ -0,0 +1,69 @@
+import json
+
+from app.metrics import MetricsRegistry, MultiprocessStore, merge_snapshots, render_text
+from tests.conftest import login_session
+
+
+def test_metrics_requires_admin_or_token(client, app):
+    assert client.get("/metrics").status_code == 401
+
+    login_session(client, user_id=1, role="reader")
+    assert client.get("/metrics").status_code == 403
+
+    app.config["METRICS_TOKEN"] = "s3cret"
+    resp = app.test_client().get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+
+
+def test_metrics_exposes_latency_sql_and_security_counters(client):
+    client.get("/books/")  # sin sesión: 401 + evento deny_unauthorized
+
+    login_session(client, user_id=1, role="admin")
+    client.get("/books/")
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_requests_total{endpoint="books.list_books",method="GET",status="200"} 1' in body
+    assert 'http_requests_total{endpoint="books.list_books",method="GET",status="401"} 1' in body
+    assert 'http_request_duration_seconds_bucket{endpoint="books.list_books",method="GET",status="200",le="+Inf"} 1' in body
+    assert 'db_queries_total{endpoint="books.list_books"}' in body
+    assert 'security_events_total{event_type="deny_unauthorized"} 1' in body
+
+
+def test_multiprocess_snapshots_are_summed(tmp_path):
+    a, b = MetricsRegistry(), MetricsRegistry()
+    a.inc("http_requests_total", endpoint="x", method="GET", status=200)
+    b.inc("http_requests_total", 2, endpoint="x", method="GET", status=200)
+    a.observe("http_request_duration_seconds", 0.02, endpoint="x", method="GET", status=200)
+    b.observe("http_request_duration_seconds", 3.0, endpoint="x", method="GET", status=200)
+
+    # dos "workers" escribiendo en el mismo directorio
+    store = MultiprocessStore(str(tmp_path), a)
+    store.flush(force=True)
+    (tmp_path / "metrics_other.json").write_text(json.dumps(b.snapshot()))
+
+    body = render_text(merge_snapshots(store.collect()))
+    assert 'http_requests_total{endpoint="x",method="GET",status="200"} 3' in body
+    assert 'http_request_duration_seconds_bucket{endpoint="x",method="GET",status="200",le="0.025"} 1' in body
+    assert 'http_request_duration_seconds_count{endpoint="x",method="GET",status="200"} 2' in body
+
+
+def test_each_worker_snapshot_includes_writer_totals(tmp_path):
+    from app import create_app
+
+    worker = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "SECURITY_EVENTS_ASYNC": True,
+        "METRICS_MULTIPROC_DIR": str(tmp_path),
+    })
+    writer = worker.extensions["security_event_writer"]
+    writer.stats.written = 7
+
+    # volcado normal (tras una request), sin que este worker sirva /metrics
+    worker.extensions["metrics_store"].flush(force=True)
+
+    (snapshot,) = [json.loads(p.read_text()) for p in tmp_path.glob("metrics_*.json")]
+    counters = {(n, tuple(map(tuple, labels))): v for n, labels, v in snapshot["counters"]}
+    assert counters[("security_event_writer_events_total", (("outcome", "written"),))] == 7
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import Book
+from app.models.book_request import BookRequest
+from tests.conftest import ensure_user, login_session
+
+
+def _seed(n, requester_id=1):
+    ensure_user(2)
+    ensure_user(requester_id)
+    ts = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(n):
+        book = Book(title=f"Libro {i}", author="Autor", donor_id=2)
+        db.session.add(book)
+        db.session.flush()
+        db.session.add(BookRequest(
+            book_id=book.id,
+            requester_id=requester_id,
+            status="accepted" if i % 3 == 0 else "pending",
+            created_at=ts.replace(minute=i),
+        ))
+    db.session.commit()
+
+
+def _walk(client, qs):
+    seen, cursor = [], None
+    while True:
+        url = f"/requests/mine?{qs}" + (f"&cursor={cursor}" if cursor else "")
+        res = client.get(url)
+        assert res.status_code == 200
+        data = res.get_json()
+        seen.extend(r["book"]["title"] for r in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_my_requests_pages_newest_first_with_book_fields(client):
+    _seed(5)
+    login_session(client, user_id=1)
+
+    first = client.get("/requests/mine?limit=2").get_json()
+    assert first["items"][0]["book"] == {"id": 5, "title": "Libro 4", "author": "Autor", "donor_id": 2}
+    assert first["next_cursor"]
+
+    assert _walk(client, "limit=2") == ["Libro 4", "Libro 3", "Libro 2", "Libro 1", "Libro 0"]
+    assert _walk(client, "limit=1&status=accepted") == ["Libro 3", "Libro 0"]
+
+
+def test_my_requests_runs_one_query_regardless_of_history(client, count_queries):
+    _seed(6)
+    login_session(client, user_id=1)
+
+    with count_queries() as queries:
+        assert len(client.get("/requests/mine").get_json()["items"]) == 6
+
+    assert len(queries.matching("book_requests")) == 1
+
+
+def test_my_requests_validates_params(client):
+    login_session(client, user_id=1)
+    assert client.get("/requests/mine?status=approved").status_code == 400
+    assert client.get("/requests/mine?cursor=bad").status_code == 400
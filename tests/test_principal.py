@@ -0,0 +1,54 @@
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.user import User
+from tests.conftest import login_session, ensure_user
+
+
+def test_principal_is_one_projection_per_request(client, count_queries):
+    login_session(client, user_id=1, role="reader")
+    with count_queries() as queries:
+        assert client.get("/books/ping").status_code == 200
+        first = queries.selects("users")
+        queries.clear()
+        assert client.get("/books/ping").status_code == 200
+        second = queries.selects("users")
+
+    # RBAC, bloqueo y decoradores comparten la misma fila (g.principal)
+    assert len(first) == 1
+    assert len(second) == 1
+    assert "password_hash" not in second[0]
+
+
+def test_blocking_user_takes_effect_on_next_request(client, app):
+    login_session(client, user_id=1, role="reader")
+    assert client.get("/books/ping").status_code == 200
+
+    ensure_user(1, role="reader", is_active=True, is_blocked=True)
+
+    assert client.get("/books/ping").status_code == 403
+
+
+def test_admin_block_endpoint_takes_effect_immediately(app):
+    admin = app.test_client()
+    reader = app.test_client()
+
+    login_session(admin, user_id=10, role="admin")
+    login_session(reader, user_id=11, role="reader")
+    assert reader.get("/books/ping").status_code == 200
+
+    res = admin.patch("/api/admin/users/11/block", json={"is_blocked": True})
+    assert res.status_code == 200
+
+    assert reader.get("/books/ping").status_code == 403
+
+
+def test_core_update_block_takes_effect_immediately(client):
+    login_session(client, user_id=1, role="reader")
+    assert client.get("/books/ping").status_code == 200
+
+    # escritura fuera del ORM (otro worker, script, bulk): nada que invalidar
+    db.session.execute(update(User).where(User.id == 1).values(is_blocked=True))
+    db.session.commit()
+
+    assert client.get("/books/ping").status_code == 403
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from app.security.rate_limit import MemoryBackend, SQLiteBackend, RedisBackend
+
+
+def test_memory_backend_allows_burst_then_limits():
+    backend = MemoryBackend()
+
+    results = [backend.acquire("1.2.3.4:auth.login", limit=3, window_sec=60) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[0].remaining == 2
+    assert results[3].retry_after > 0
+
+
+def test_memory_backend_sweeps_idle_keys():
+    backend = MemoryBackend()
+    backend.acquire("idle", limit=10, window_sec=1)
+    backend.acquire("busy", limit=1, window_sec=3600)
+
+    removed = backend.sweep(now=time.time() + 5)
+
+    assert removed == 1
+    assert len(backend) == 1
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    worker_a = SQLiteBackend(path)
+    worker_b = SQLiteBackend(path)
+
+    assert worker_a.acquire("k", limit=2, window_sec=60).allowed
+    assert worker_b.acquire("k", limit=2, window_sec=60).allowed
+    assert not worker_a.acquire("k", limit=2, window_sec=60).allowed
+
+    assert worker_b.sweep(now=time.time() + 3600) == 1
+
+
+def test_redis_backend_against_local_stand_in():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+
+    backend = RedisBackend(client=fakeredis.FakeRedis())
+
+    assert backend.acquire("k", limit=1, window_sec=60).allowed
+    assert not backend.acquire("k", limit=1, window_sec=60).allowed
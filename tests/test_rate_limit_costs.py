@@ -0,0 +1,35 @@
+from tests.conftest import login_session
+
+
+def test_login_is_limited_with_ratelimit_headers(client, app):
+    app.config["RATELIMIT_ENABLED"] = True
+
+    for _ in range(10):
+        res = client.post("/auth/login", json={})
+        assert res.status_code == 400
+        assert "RateLimit-Remaining" in res.headers
+
+    res = client.post("/auth/login", json={})
+    assert res.status_code == 429
+    assert res.headers["RateLimit-Remaining"] == "0"
+    assert int(res.headers["Retry-After"]) >= 1
+
+
+def test_unfiltered_search_draws_budget_faster(client, app):
+    app.config["RATELIMIT_ENABLED"] = True
+    login_session(client, user_id=1, role="reader")
+
+    # reloj parado: el bucket no se rellena entre peticiones, por lentas que sean
+    app.extensions["rate_limiter"].clock = lambda: 1_000_000.0
+
+    r1 = client.get("/books/search?q=quijote")
+    r2 = client.get("/books/search?q=quijote")
+    cheap = int(r1.headers["RateLimit-Remaining"]) - int(r2.headers["RateLimit-Remaining"])
+
+    r3 = client.get("/books/search?per_page=100")
+    heavy = int(r2.headers["RateLimit-Remaining"]) - int(r3.headers["RateLimit-Remaining"])
+
+    assert r3.status_code == 200
+    assert r1.headers["RateLimit-Limit"] == "300"
+    assert cheap == 1
+    assert heavy > cheap
@@ -0,0 +1,154 @@
+from app.extensions import db
+from app.models import Book
+from app.models.book_request import BookRequest
+from app.services.request_transitions import rebuild_request_counters, transition_request
+from tests.conftest import ensure_user, login_session
+
+
+def _seed(n_requesters=2):
+    ensure_user(2)
+    book = Book(title="A", author="X", donor_id=2, pending_count=n_requesters)
+    db.session.add(book)
+    db.session.flush()
+    reqs = []
+    for uid in range(10, 10 + n_requesters):
+        ensure_user(uid)
+        reqs.append(BookRequest(book_id=book.id, requester_id=uid))
+    db.session.add_all(reqs)
+    db.session.commit()
+    return book.id, [r.id for r in reqs]
+
+
+def _is_available(book_id):
+    db.session.expire_all()
+    return db.session.get(Book, book_id).is_available
+
+
+def test_donor_accept_claims_book_and_second_accept_conflicts(client):
+    book_id, (r1, r2) = _seed()
+    login_session(client, user_id=2)
+
+    res = client.patch(f"/requests/{r1}/accept")
+    assert res.status_code == 200
+    assert res.get_json()["status"] == "accepted"
+    assert _is_available(book_id) is False
+
+    res = client.patch(f"/requests/{r2}/accept")
+    assert res.status_code == 409
+    assert res.get_json()["error"] == "book_not_available"
+    assert db.session.get(BookRequest, r2).status == "pending"
+
+
+def test_transition_checks_state_and_ownership(client):
+    book_id, (r1, _) = _seed()
+
+    login_session(client, user_id=11)
+    assert client.patch(f"/requests/{r1}/cancel").status_code == 403
+    assert client.patch(f"/requests/{r1}/accept").status_code == 403
+    assert client.patch("/requests/999/cancel").status_code == 404
+
+    login_session(client, user_id=10)
+    assert client.patch(f"/requests/{r1}/cancel").status_code == 200
+    res = client.patch(f"/requests/{r1}/cancel")
+    assert res.status_code == 400
+    assert res.get_json() == {"error": "invalid_state", "current": "cancelled", "allowed": ["pending"]}
+
+
+def test_reject_releases_book_only_without_accepted_requests(client, app):
+    book_id, (r1, r2) = _seed()
+    assert transition_request(r1, "accepted").ok
+    db.session.commit()
+
+    login_session(client, user_id=2)
+    assert client.patch(f"/requests/{r2}/reject").status_code == 200
+    assert _is_available(book_id) is False
+
+    login_session(client, user_id=3, role="admin")
+    res = client.patch(f"/api/admin/book-requests/{r1}/status", json={"status": "rejected"})
+    assert res.status_code == 200
+    assert res.get_json()["old_status"] == "accepted"
+    assert _is_available(book_id) is True
+
+
+def test_admin_status_change_does_not_read_status_first(client, count_queries):
+    book_id, (r1, _) = _seed()
+    login_session(client, user_id=3, role="admin")
+
+    with count_queries() as queries:
+        res = client.patch(f"/api/admin/book-requests/{r1}/status", json={"status": "rejected"})
+
+    assert res.get_json()["old_status"] == "pending"
+    assert queries.selects("book_requests") == []
+
+    # ya rechazada: no-op, 200 con el estado actual
+    res = client.patch(f"/api/admin/book-requests/{r1}/status", json={"status": "rejected"})
+    assert (res.status_code, res.get_json()["old_status"]) == (200, "rejected")
+    assert client.patch("/api/admin/book-requests/999/status", json={"status": "rejected"}).status_code == 404
+
+
+def test_stale_transition_fails_without_side_effects(app):
+    book_id, (r1, _) = _seed()
+    assert transition_request(r1, "cancelled").ok
+    db.session.commit()
+
+    result = transition_request(r1, "accepted")
+    assert (result.ok, result.error, result.status) == (False, "invalid_state", "cancelled")
+    assert _is_available(book_id) is True
+
+
+def test_failed_transition_leaves_caller_transaction_alone(app):
+    book_id, (r1, _) = _seed()
+
+    # trabajo previo del llamador en la misma transacción
+    db.session.add(Book(title="Pendiente", author="Y", donor_id=2))
+    db.session.flush()
+
+    assert transition_request(999, "accepted").error == "not_found"
+    db.session.commit()
+
+    assert Book.query.filter_by(title="Pendiente").count() == 1
+
+
+def _counts(book_id):
+    db.session.expire_all()
+    book = db.session.get(Book, book_id)
+    return book.pending_count, book.accepted_count, book.is_available
+
+
+def test_counters_follow_create_and_transitions(client):
+    ensure_user(2)
+    book = Book(title="A", author="X", donor_id=2)
+    db.session.add(book)
+    db.session.commit()
+    book_id = book.id
+
+    ids = []
+    for uid in (10, 11):
+        login_session(client, user_id=uid)
+        ids.append(client.post("/requests/", json={"book_id": book_id}).get_json()["id"])
+    assert _counts(book_id) == (2, 0, True)
+
+    login_session(client, user_id=2)
+    client.patch(f"/requests/{ids[0]}/accept")
+    assert _counts(book_id) == (1, 1, False)
+
+    login_session(client, user_id=11)
+    client.patch(f"/requests/{ids[1]}/cancel")
+    assert _counts(book_id) == (0, 1, False)
+
+    login_session(client, user_id=3, role="admin")
+    client.patch(f"/admin/book-requests/{ids[0]}/status", json={"status": "rejected"})
+    assert _counts(book_id) == (0, 0, True)
+
+
+def test_rebuild_counters_repairs_drift(app):
+    book_id, (r1, _) = _seed()
+    db.session.get(BookRequest, r1).status = "accepted"
+    book = db.session.get(Book, book_id)
+    book.pending_count = 7
+    db.session.commit()
+
+    assert rebuild_request_counters() == 2
+    db.session.commit()
+    assert _counts(book_id) == (1, 1, False)
+    assert rebuild_request_counters() == 0
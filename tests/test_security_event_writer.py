@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+from app.extensions import db
+from app.models.security_event import SecurityEvent
+from app.security.event_writer import SecurityEventWriter
+
+
+def _row(i=0):
+    return dict(
+        created_at=datetime.now(timezone.utc),
+        event_type="rate_limited",
+        status_code=429,
+        endpoint="auth.login",
+        blueprint="auth",
+        method="POST",
+        path="/auth/login",
+        user_id=None,
+        role=None,
+        ip=f"10.0.0.{i}",
+        details=None,
+    )
+
+
+def test_writer_flushes_queued_events_in_bulk(app):
+    writer = SecurityEventWriter(app, batch_size=50, flush_ms=60_000)
+
+    for i in range(120):
+        assert writer.submit(_row(i)) is True
+    writer.flush()
+
+    assert db.session.query(SecurityEvent).count() == 120
+    assert writer.stats.enqueued == 120
+    assert writer.stats.written == 120
+    assert writer.stats.dropped == 0
+    writer.stop()
+
+
+def test_writer_drop_policy_counts_overflow(app):
+    writer = SecurityEventWriter(app, max_queue=5, flush_ms=60_000, overflow="drop")
+    # sin worker: la cola se llena y el resto se descarta
+    writer._ensure_started = lambda: None
+
+    accepted = sum(writer.submit(_row(i)) for i in range(8))
+
+    assert accepted == 5
+    assert writer.stats.dropped == 3
+
+    writer.stop()
+    assert db.session.query(SecurityEvent).count() == 5
+
+
+def test_writer_stop_flushes_pending_events(app):
+    writer = SecurityEventWriter(app, batch_size=1000, flush_ms=60_000)
+    for i in range(10):
+        writer.submit(_row(i))
+
+    writer.stop()
+
+    assert db.session.query(SecurityEvent).count() == 10
+
+
+def test_identical_events_fold_into_one_counted_row(app):
+    app.config["SECURITY_EVENTS_AGGREGATE_WINDOW"] = 86400
+    writer = SecurityEventWriter(app, batch_size=10, flush_ms=60_000)
+
+    for _ in range(25):
+        writer.submit(_row(1))
+    writer.submit(_row(2))
+    writer.stop()
+
+    rows = db.session.query(SecurityEvent).order_by(SecurityEvent.ip).all()
+    assert [(r.ip, r.count) for r in rows] == [("10.0.0.1", 25), ("10.0.0.2", 1)]
+    assert rows[0].first_seen <= rows[0].last_seen
+
+
+def test_separate_flushes_upsert_into_the_same_bucket_row(app):
+    from app.security.security_events import store_security_events
+
+    for _ in range(3):
+        store_security_events([_row(1), _row(1)], window_sec=86400)
+        db.session.commit()
+
+    rows = db.session.query(SecurityEvent).all()
+    assert [(r.ip, r.count) for r in rows] == [("10.0.0.1", 6)]